@@ -1,21 +1,12 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog, filedialog
-from datetime import datetime, timedelta
-import json
-import random
+from tkinter import ttk, messagebox, filedialog
 import time
-import os
-import shutil
-from modules.stock_market import StockMarket
-from modules.player import Player
 from modules.game_ui import GameUI
-from modules.event_system import EventSystem
 from modules.save_system import SaveSystem
-from modules.lottery import Lottery
-from modules.crypto import CryptoMarket, CryptoWallet
-from modules.forex import ForexMarket, ForexWallet
+from modules.scheduler import TickScheduler
+from modules.simulation import GameSimulation
 
-class StockGame:
+class StockGame(GameSimulation):
     def __init__(self):
         # 创建主窗口
         self.root = tk.Tk()
@@ -44,21 +35,12 @@ class StockGame:
         }
         self.current_theme = 'light'  # 默认使用浅色主题
         
-        # 初始化游戏系统
-        self.game_date = datetime(2023, 1, 1)  # 游戏起始日期
-        self.tick_count = 0  # 用于计数刷新次数
-        self.is_paused = False  # 游戏暂停状态
-        
-        # 初始化各个子系统
-        self.stock_market = StockMarket()
-        self.player = Player(initial_money=100000)  # 初始资金10万
-        self.event_system = EventSystem()
+        # 初始化游戏系统及各个子系统（初始资金10万）
+        super().__init__(initial_money=100000)
         self.save_system = SaveSystem()
-        self.lottery = Lottery()
-        self.crypto_market = CryptoMarket()
-        self.crypto_wallet = CryptoWallet()
-        self.forex_market = ForexMarket()
-        self.forex_wallet = ForexWallet()
+        
+        # 启动时报告目标行业没有匹配股票的事件
+        self.event_system.report_unmatched_industries(self.stock_market)
         
         # 初始化UI
         self.game_ui = GameUI(self.root, self)
@@ -66,10 +48,8 @@ class StockGame:
         # 应用主题
         self.apply_theme()
         
-        # 游戏速度控制
-        self.base_update_interval = 1000  # 基础更新间隔（毫秒）
-        self.game_speed = 1.0  # 游戏速度倍率
-        self.update_interval = self.base_update_interval / self.game_speed
+        # 模拟与界面刷新解耦：高倍速时每次回调批量执行多个tick，界面最多30帧/秒
+        self.scheduler = TickScheduler(max_fps=30)
         
         # 启动游戏循环
         self.update_game()
@@ -104,35 +84,21 @@ class StockGame:
     def update_game(self):
         """游戏主循环"""
         if not self.is_paused:
-            self.tick_count += 1
-            
-            # 每60个tick更新一次日期（相当于1分钟=1天）
-            if self.tick_count >= 60:
-                self.game_date += timedelta(days=1)
-                self.tick_count = 0
-                
-                # 检查事件
-                self.event_system.check_events(self.player, self.stock_market, self.game_date)
-                
-                # 更新彩票
-                self.lottery.draw_lottery(self.game_date)
-                self.lottery.claim_prizes(self.game_date)
-            
-            # 更新市场
-            self.stock_market.update_prices()
-            
-            # 直接更新加密货币和外汇市场，它们的波动频率会随游戏速度变化
-            self.crypto_market.update_market()
-            self.forex_market.update_market()
+            # 按游戏速度计算本次应执行的tick数，并在时间预算内批量模拟
+            ticks = self.scheduler.ticks_due(self.update_interval)
+            start = time.perf_counter()
+            for _ in range(ticks):
+                self.simulate_tick()
+            self.scheduler.record(ticks, (time.perf_counter() - start) * 1000)
             
-            # 更新玩家状态
-            self.player.update_loans_and_deposits(self.game_date)
-            
-            # 更新UI显示
-            self.game_ui.update_display()
+            # 更新UI显示（限制刷新帧率）
+            if ticks and self.scheduler.should_render():
+                self.game_ui.update_display()
+        else:
+            self.scheduler.reset()
         
-        # 继续游戏循环，更新间隔随游戏速度变化
-        self.root.after(int(self.update_interval), self.update_game)
+        # 继续游戏循环，回调间隔随游戏速度变化
+        self.root.after(self.scheduler.next_delay_ms(self.update_interval), self.update_game)
     
     def save_game(self):
         """保存游戏"""
@@ -145,13 +111,13 @@ class StockGame:
     
     def load_game(self):
         """加载游戏"""
-        saves = self.save_system.list_saves()
-        if not saves:
+        latest = self.save_system.latest_save()
+        if not latest:
             messagebox.showinfo("提示", "没有找到存档")
             return
             
         # TODO: 显示存档列表供选择
-        save_name = saves[-1]["name"]  # 暂时加载最新存档
+        save_name = latest["name"]  # 暂时加载最新存档
         success, message = self.save_system.load_game(self, save_name)
         if success:
             messagebox.showinfo("加载成功", message)
@@ -159,6 +125,12 @@ class StockGame:
         else:
             messagebox.showerror("加载失败", message)
     
+    def fast_forward(self, days):
+        """快进指定天数，期间不刷新界面"""
+        self.advance(days)
+        self.scheduler.reset()
+        self.game_ui.update_display()
+    
     def toggle_pause(self):
         """切换游戏暂停状态"""
         self.is_paused = not self.is_paused
@@ -179,7 +151,7 @@ class StockGame:
         save_name = f"game_save_{self.game_date.strftime('%Y%m%d_%H%M%S')}"
         file_path = filedialog.asksaveasfilename(
             defaultextension=".sav",
-            filetypes=[("Save files", "*.sav")],
+            filetypes=[("Save files", "*.sav"), ("JSON files", "*.json")],
             initialfile=save_name
         )
         if file_path:
@@ -192,7 +164,7 @@ class StockGame:
     def import_save(self):
         """导入存档"""
         file_path = filedialog.askopenfilename(
-            filetypes=[("Save files", "*.sav")]
+            filetypes=[("Save files", "*.sav"), ("JSON files", "*.json")]
         )
         if file_path:
             try:
@@ -209,22 +181,8 @@ class StockGame:
                 # 删除所有存档
                 self.save_system.delete_all_saves()
                 
-                # 重置游戏状态
-                self.game_date = datetime(2023, 1, 1)
-                self.tick_count = 0
-                self.is_paused = False
-                self.game_speed = 1.0
-                self.update_interval = self.base_update_interval / self.game_speed
-                
-                # 重新初始化所有系统
-                self.stock_market = StockMarket()
-                self.player = Player(initial_money=100000)
-                self.event_system = EventSystem()
-                self.lottery = Lottery()
-                self.crypto_market = CryptoMarket()
-                self.crypto_wallet = CryptoWallet()
-                self.forex_market = ForexMarket()
-                self.forex_wallet = ForexWallet()
+                # 重置游戏状态并重新初始化所有系统
+                self.reset_state()
                 
                 # 更新显示
                 self.game_ui.update_display()
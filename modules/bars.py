@@ -0,0 +1,127 @@
+import numpy as np
+from modules.history import DAY_NS, TICKS_PER_DAY, WEEK_OFFSET
+
+# K线周期：名称 -> (周期长度纳秒, 分桶偏移, 保留根数)
+BAR_PERIODS = {
+    'tick': (DAY_NS // TICKS_PER_DAY, 0, 240),  # 分时：最近4个游戏日
+    'day': (DAY_NS, 0, 365),                     # 日K：最近一年
+    'week': (7 * DAY_NS, WEEK_OFFSET, 260),      # 周K：最近五年
+}
+
+class BarBlock:
+    """多行共享的定长环形 OHLCV K线缓冲区（同一周期）
+
+    所有行同时更新，因此共用一个时间轴和当前K线位置；与 HistoryBlock 一样
+    每根K线同时写到 i 和 i+capacity，最近的K线在内存中始终连续
+    """
+
+    FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, rows, period, offset=0, capacity=240):
+        self.rows = rows
+        self.period = period      # K线周期（纳秒）
+        self.offset = offset      # 分桶偏移（纳秒）
+        self.capacity = capacity
+        self.times = np.zeros(2 * capacity, dtype=np.int64)  # 每根K线的起始时间
+        for field in self.FIELDS:
+            setattr(self, field, np.zeros((rows, 2 * capacity), dtype=np.float64))
+        self.head = 0         # 当前（最新）K线的位置
+        self.count = 0        # 已保存的K线数
+        self.bucket = None    # 当前K线所在的周期序号
+
+    def _write(self, slot, field, values):
+        getattr(self, field)[:, slot] = getattr(self, field)[:, slot + self.capacity] = values
+
+    def _open_bar(self, bucket, opens, highs, lows, closes, volumes):
+        """开始一根新K线"""
+        if self.bucket is not None:
+            self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.bucket = bucket
+        self.times[self.head] = self.times[self.head + self.capacity] = bucket * self.period - self.offset
+        for field, values in zip(self.FIELDS, (opens, highs, lows, closes, volumes)):
+            self._write(self.head, field, values)
+
+    def _merge_bar(self, highs, lows, closes, volumes):
+        """把新数据并入当前K线"""
+        head = self.head
+        self._write(head, 'high', np.maximum(self.high[:, head], highs))
+        self._write(head, 'low', np.minimum(self.low[:, head], lows))
+        self._write(head, 'close', closes)
+        self._write(head, 'volume', self.volume[:, head] + volumes)
+
+    def update(self, timestamp, prices, volumes):
+        """写入一个时刻全部行的价格和成交量"""
+        bucket = (int(timestamp) + self.offset) // self.period
+        if bucket == self.bucket:
+            self._merge_bar(prices, prices, prices, volumes)
+        else:
+            self._open_bar(bucket, prices, prices, prices, prices, volumes)
+
+    def extend(self, timestamps, prices, volumes):
+        """按时间顺序批量写入多个时刻，prices 和 volumes 形状为 (时刻数, 行数)"""
+        buckets = (np.asarray(timestamps, dtype=np.int64) + self.offset) // self.period
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        opens = prices[starts]
+        highs = np.maximum.reduceat(prices, starts, axis=0)
+        lows = np.minimum.reduceat(prices, starts, axis=0)
+        closes = prices[np.r_[starts[1:], len(buckets)] - 1]
+        sums = np.add.reduceat(volumes, starts, axis=0)
+
+        # 超出容量的部分会被覆盖，只需写入最后 capacity 根（第一根可能并入当前K线，多保留一根）
+        first = max(0, len(starts) - self.capacity - 1)
+        for i in range(first, len(starts)):
+            bucket = int(buckets[starts[i]])
+            if bucket == self.bucket:
+                self._merge_bar(highs[i], lows[i], closes[i], sums[i])
+            else:
+                self._open_bar(bucket, opens[i], highs[i], lows[i], closes[i], sums[i])
+
+    def window(self):
+        """最近K线在存储中的切片范围"""
+        end = self.head + self.capacity + 1
+        return slice(end - self.count, end)
+
+    def series(self, row):
+        """某一行的K线数据：(起始时间, 开, 高, 低, 收, 量) 只读零拷贝视图"""
+        window = self.window()
+        views = [self.times[window]] + [getattr(self, field)[row, window] for field in self.FIELDS]
+        for view in views:
+            view.flags.writeable = False
+        return tuple(views)
+
+    def load(self, times, fields):
+        """用保存的K线替换全部数据，fields 为各字段 (行数, K线数) 数组，缺少的开高低字段取收盘价"""
+        times = np.asarray(times, dtype=np.int64)[-self.capacity:]
+        count = len(times)
+        self.times[:count] = self.times[self.capacity:self.capacity + count] = times
+        for field in self.FIELDS:
+            values = np.asarray(fields.get(field, fields['close']), dtype=np.float64)[:, -self.capacity:]
+            column = getattr(self, field)
+            column[:, :count] = column[:, self.capacity:self.capacity + count] = values
+        self.count = count
+        self.head = (count - 1) % self.capacity if count else 0
+        self.bucket = (int(times[-1]) + self.offset) // self.period if count else None
+
+class BarAggregator:
+    """按 tick、游戏日、周三个周期增量聚合全部股票的 OHLCV K线"""
+
+    def __init__(self, rows, periods=BAR_PERIODS):
+        self.blocks = {
+            name: BarBlock(rows, period, offset, capacity)
+            for name, (period, offset, capacity) in periods.items()
+        }
+
+    def update(self, timestamp, prices, volumes):
+        """写入一个 tick 的价格和成交量"""
+        for block in self.blocks.values():
+            block.update(timestamp, prices, volumes)
+
+    def extend(self, timestamps, prices, volumes):
+        """批量写入多个 tick"""
+        for block in self.blocks.values():
+            block.extend(timestamps, prices, volumes)
+
+    def series(self, row, period='day'):
+        """某一行指定周期的K线数据"""
+        return self.blocks[period].series(row)
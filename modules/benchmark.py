@@ -0,0 +1,357 @@
+"""性能基准：覆盖每个tick路径上的子系统，结果以 JSON 输出便于跨提交对比
+
+用法示例：
+    python -m modules.benchmark --out bench.json
+    python -m modules.benchmark --filter lottery --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import numpy as np
+from modules.stock_market import StockMarket
+from modules.crypto import CryptoMarket
+from modules.forex import ForexMarket
+from modules.event_system import EventSystem
+from modules.lottery import Lottery, random_tickets
+from modules.player import Player
+from modules.save_system import SaveSystem
+from modules.simulation import GameSimulation
+from modules.downsample import lttb_indices
+from modules.history import HistoryBlock
+
+SEED = 20230101
+
+def _rng(seed):
+    """由种子创建 Generator，保证每次基准的输入一致"""
+    return np.random.default_rng(seed)
+
+def _seeded_market(seed, vectorized=False, correlated=False):
+    return StockMarket(vectorized=vectorized, correlated=correlated, rng=_rng(seed))
+
+# ---- 各基准用例：参数为随机种子和临时存档系统，返回一个无参可调用对象，每次调用为一次操作 ----
+
+def bench_stock_update_price(seed, saves):
+    market = _seeded_market(seed)
+    stock = market.get_stock("000858")
+    return lambda: stock.update_price(0.001)
+
+def bench_market_update_prices(seed, saves):
+    market = _seeded_market(seed)
+    return market.update_prices
+
+def bench_market_update_prices_vectorized(seed, saves):
+    market = _seeded_market(seed, vectorized=True)
+    return market.update_prices
+
+def bench_market_update_prices_correlated(seed, saves):
+    market = _seeded_market(seed, correlated=True)
+    return market.update_prices
+
+def bench_history_append_rows(seed, saves):
+    prices = 100 + _rng(seed).random(100)
+    history = HistoryBlock(len(prices), capacity=100, clock=iter(range(1, 10 ** 12)).__next__)
+    return lambda: history.append_rows(None, prices)
+
+def bench_crypto_update_market(seed, saves):
+    return CryptoMarket(rng=_rng(seed)).update_market
+
+def bench_forex_update_market(seed, saves):
+    return ForexMarket(rng=_rng(seed)).update_market
+
+def bench_event_check_events(seed, saves):
+    market = _seeded_market(seed)
+    player = Player(100000, price_source=market)
+    events = EventSystem(rng=_rng(seed))
+    state = {'date': datetime(2023, 1, 1)}
+
+    def run():
+        state['date'] += timedelta(days=1)
+        events.check_events(player, market, state['date'])
+    return run
+
+def bench_market_industry_change(seed, saves):
+    market = _seeded_market(seed)
+    return lambda: market.apply_industry_change("新能源", 0.0)
+
+def bench_event_apply_effect(seed, saves):
+    market = _seeded_market(seed)
+    player = Player(100000, price_source=market)
+    event = next(e for e in EventSystem(rng=_rng(seed)).events if e.name == "经济数据向好")
+    return lambda: event.effect(player, market)
+
+def _lottery_with_tickets(seed, count):
+    lottery = Lottery(rng=_rng(seed))
+    picker = random.Random(seed)
+    buy_date = datetime(2023, 1, 2)
+    tickets = [(picker.sample(range(1, 34), 6), picker.randint(1, 16)) for _ in range(count)]
+    lottery.add_tickets(buy_date, tickets)
+    draw_date = datetime(2023, 1, 3)  # 周二开奖
+
+    def run():
+        lottery.last_draw_date = None
+        lottery.unclaimed_prizes.clear()
+        lottery.draw_lottery(draw_date)
+    return run
+
+def bench_lottery_draw_1m(seed, saves):
+    lottery = Lottery(rng=_rng(seed))
+    lottery.add_ticket_masks(datetime(2023, 1, 2), *random_tickets(_rng(seed), 1000000))
+    draw_date = datetime(2023, 1, 3)
+
+    def run():
+        lottery.last_draw_date = None
+        lottery.unclaimed_prizes.clear()
+        lottery.draw_lottery(draw_date)
+    return run
+
+def bench_lottery_draw_10k(seed, saves):
+    return _lottery_with_tickets(seed, 10000)
+
+def bench_lottery_draw_100k(seed, saves):
+    return _lottery_with_tickets(seed, 100000)
+
+def bench_player_total_assets(seed, saves):
+    market = _seeded_market(seed)
+    player = Player(10000000, price_source=market)
+    for stock in market.get_all_stocks()[:50]:
+        player.buy_stock(stock.code, 100, stock.price)
+    # 每次调用前只调整其中 5 只持仓的价格（交替涨跌，价格不漂移），不把整个市场的 tick 计入耗时
+    rows = np.arange(0, 50, 10)
+    factors = [np.full(len(rows), 1.001), np.full(len(rows), 1 / 1.001)]
+    state = {'tick': 0}
+
+    def run():
+        state['tick'] += 1
+        market.apply_price_factors(rows, factors[state['tick'] % 2])
+        player.calculate_total_assets(market)
+    return run
+
+def bench_simulation_tick(seed, saves):
+    return GameSimulation(seed=seed).simulate_tick
+
+def bench_simulation_advance_week(seed, saves):
+    game = GameSimulation(vectorized=True, seed=seed)
+    return lambda: game.advance(7)
+
+def _game_with_full_histories(seed, transactions=10000):
+    """构造一个价格历史已写满、带有大量交易流水的游戏状态"""
+    game = GameSimulation(initial_money=1e12, seed=seed)
+    for stock in game.stock_market.get_all_stocks():
+        for _ in range(stock.price_history.capacity):
+            stock.record_price()
+    for crypto in game.crypto_market.cryptos.values():
+        for _ in range(crypto.price_history.capacity):
+            crypto.price_history.append(crypto.price)
+
+    # 交替买卖生成交易流水，卖出记录比买入多一个 profit 字段
+    stocks = game.stock_market.get_all_stocks()
+    for i in range(transactions // 2):
+        stock = stocks[i % len(stocks)]
+        game.player.buy_stock(stock.code, 200, stock.price)
+        game.player.sell_stock(stock.code, 100, stock.price)
+    game.forex_wallet.balances['USD'] = 1e12
+    for i in range(transactions // 10):
+        game.crypto_wallet.buy('BTC', 0.1, game.crypto_market.cryptos['BTC'].price, game.game_date)
+        game.forex_wallet.buy('USD', 'EUR', 1, game.forex_market.rates['EUR'], game.game_date)
+    return game
+
+def bench_save_game(seed, saves):
+    game = _game_with_full_histories(seed)
+
+    def run():
+        success, message = saves.save_game(game, "bench")
+        if not success:
+            raise RuntimeError(message)
+    return run
+
+def bench_load_game(seed, saves):
+    game = _game_with_full_histories(seed)
+    success, message = saves.save_game(game, "bench")
+    if not success:
+        raise RuntimeError(message)
+
+    def run():
+        success, message = saves.load_game(game, "bench")
+        if not success:
+            raise RuntimeError(message)
+    return run
+
+def bench_export_json(seed, saves):
+    game = _game_with_full_histories(seed)
+    path = os.path.join(saves.save_dir, "bench.json")
+    return lambda: saves.export_save(game, path)
+
+def bench_import_json(seed, saves):
+    game = _game_with_full_histories(seed)
+    path = os.path.join(saves.save_dir, "bench.json")
+    saves.export_save(game, path)
+    return lambda: saves.import_save(game, path)
+
+def bench_downsample_lttb(seed, saves):
+    rng = _rng(seed)
+    times = np.arange(100000, dtype=np.int64)
+    prices = 100 + np.cumsum(rng.normal(0, 1, len(times)))
+    return lambda: lttb_indices(times, prices, 800)
+
+BENCHMARKS = [
+    ('stock.update_price', bench_stock_update_price),
+    ('stock_market.update_prices', bench_market_update_prices),
+    ('stock_market.update_prices[vectorized]', bench_market_update_prices_vectorized),
+    ('stock_market.update_prices[correlated]', bench_market_update_prices_correlated),
+    ('history.append_rows[100]', bench_history_append_rows),
+    ('crypto_market.update_market', bench_crypto_update_market),
+    ('forex_market.update_market', bench_forex_update_market),
+    ('stock_market.apply_industry_change', bench_market_industry_change),
+    ('event_system.check_events', bench_event_check_events),
+    ('event_system.apply_effect', bench_event_apply_effect),
+    ('lottery.draw_lottery[10k]', bench_lottery_draw_10k),
+    ('lottery.draw_lottery[100k]', bench_lottery_draw_100k),
+    ('lottery.draw_lottery[1m]', bench_lottery_draw_1m),
+    ('player.calculate_total_assets', bench_player_total_assets),
+    ('simulation.simulate_tick', bench_simulation_tick),
+    ('simulation.advance[7d]', bench_simulation_advance_week),
+    ('save_system.save_game', bench_save_game),
+    ('save_system.load_game', bench_load_game),
+    ('save_system.export_save[json]', bench_export_json),
+    ('save_system.import_save[json]', bench_import_json),
+    ('downsample.lttb[100k]', bench_downsample_lttb),
+]
+
+# ---- 计时与内存统计 ----
+
+def _calibrate(func, min_time):
+    """确定每轮调用次数，使单轮耗时不少于 min_time 秒"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time or number >= 1000000:
+            return number
+        number *= 2
+
+def measure(func, rounds=5, min_time=0.2):
+    """测量单次调用耗时以及内存分配情况"""
+    func()  # 预热
+    number = _calibrate(func, min_time)
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    # 单独统计内存，避免 tracemalloc 的开销影响计时
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    base_current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(number):
+        func()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = after.compare_to(before, 'filename')
+
+    median = statistics.median(timings)
+    return {
+        'rounds': rounds,
+        'number': number,
+        'min_ms': min(timings) * 1000,
+        'median_ms': median * 1000,
+        'mean_ms': statistics.mean(timings) * 1000,
+        'ops_per_sec': 1 / median if median > 0 else None,
+        'peak_kib': (peak - base_current) / 1024,
+        'net_kib': sum(stat.size_diff for stat in diff) / 1024,
+        'net_blocks': sum(stat.count_diff for stat in diff),
+    }
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def run_benchmarks(name_filter=None, rounds=5, min_time=0.2, seed=SEED):
+    """运行基准，返回可序列化的结果字典"""
+    results = []
+    # 存档基准在临时目录中运行，避免污染 saves 目录
+    save_dir = tempfile.mkdtemp(prefix="stock_game_bench_")
+    saves = SaveSystem(save_dir=save_dir)
+    try:
+        for name, factory in BENCHMARKS:
+            if name_filter and name_filter not in name:
+                continue
+            func = factory(seed, saves)
+            result = measure(func, rounds=rounds, min_time=min_time)
+            result['name'] = name
+            results.append(result)
+            print(f"{name:45s} {result['ops_per_sec']:>12,.1f} ops/s "
+                  f"{result['median_ms']:>10.4f} ms  peak {result['peak_kib']:>9.1f} KiB",
+                  file=sys.stderr)
+    finally:
+        shutil.rmtree(save_dir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'seed': seed,
+            'rounds': rounds,
+        },
+        'results': results,
+    }
+
+def compare(current, baseline_path):
+    """与之前保存的结果对比，打印各项吞吐量变化"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {r['name']: r for r in json.load(f)['results']}
+    print(f"{'benchmark':45s} {'baseline':>12s} {'current':>12s} {'change':>8s}", file=sys.stderr)
+    for result in current['results']:
+        old = baseline.get(result['name'])
+        if not old or not old.get('ops_per_sec'):
+            continue
+        ratio = result['ops_per_sec'] / old['ops_per_sec']
+        print(f"{result['name']:45s} {old['ops_per_sec']:>12,.1f} {result['ops_per_sec']:>12,.1f} "
+              f"{(ratio - 1) * 100:>+7.1f}%", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="股票交易游戏性能基准")
+    parser.add_argument('--out', help="结果输出路径（JSON），默认打印到标准输出")
+    parser.add_argument('--filter', help="只运行名称包含该字符串的基准")
+    parser.add_argument('--rounds', type=int, default=5, help="每项基准的计时轮数")
+    parser.add_argument('--min-time', type=float, default=0.2, help="每轮最短耗时（秒）")
+    parser.add_argument('--seed', type=int, default=SEED, help="随机种子")
+    parser.add_argument('--compare', help="与之前的结果文件对比")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.filter, rounds=args.rounds,
+                             min_time=args.min_time, seed=args.seed)
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(current, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+    if args.compare:
+        compare(current, args.compare)
+
+if __name__ == "__main__":
+    main()
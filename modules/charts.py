@@ -0,0 +1,143 @@
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.dates import DateFormatter
+from modules.downsample import DownsampleCache, merge_bars
+
+UP_COLOR = 'red'      # 上涨K线颜色（红涨绿跌）
+DOWN_COLOR = 'green'  # 下跌K线颜色
+
+# 走势图可选的时间范围（天数，None 表示全部历史）
+CHART_RANGES = {'1天': 1, '30天': 30, '1年': 365, '全部': None}
+CHART_OVERSAMPLE = 4  # 走势查询的点数上限为坐标轴像素宽度的倍数，选出更细的层级后再降采样到约每像素一个点
+CANDLE_PIXELS = 3   # 每根K线至少占用的像素宽度
+
+def draw_candlesticks(ax, volume_ax, bars, period_days):
+    """绘制K线（蜡烛图）和成交量柱
+
+    bars 为 (起始时间, 开, 高, 低, 收, 量) 数组，period_days 为每根K线的天数；
+    K线数超过坐标轴像素宽度能容纳的根数时，相邻K线合并后再绘制
+    """
+    if not len(bars[0]):
+        return
+    bars, factor = merge_bars(bars, int(ax.bbox.width) // CANDLE_PIXELS)
+    period_days *= factor
+    times, opens, highs, lows, closes, volumes = bars
+    x = mdates.date2num(times.view('datetime64[ns]')) + period_days / 2  # K线画在周期中间
+    width = period_days * 0.7
+    colors = np.where(closes >= opens, UP_COLOR, DOWN_COLOR)
+
+    # 影线
+    ax.vlines(x, lows, highs, colors=colors, linewidth=1)
+    # 实体（开收相同时保留一条细线）
+    bottoms = np.minimum(opens, closes)
+    heights = np.maximum(np.abs(closes - opens), (highs.max() - lows.min()) * 0.001)
+    ax.bar(x, heights, width, bottom=bottoms, color=colors, edgecolor=colors)
+    volume_ax.bar(x, volumes, width, color=colors)
+
+    ax.xaxis_date()
+    ax.set_xlim(x[0] - period_days, x[-1] + period_days)
+    padding = (highs.max() - lows.min()) * 0.05 or highs.max() * 0.01
+    ax.set_ylim(lows.min() - padding, highs.max() + padding)
+
+class LivePriceChart:
+    """实时价格走势图：复用同一条折线和最新价标注，通过 blitting 增量刷新
+
+    只有切换标的或价格/时间超出当前坐标范围时才整图重绘，
+    其余时候仅恢复背景并重画折线和标注；点数超过坐标轴像素宽度时先降采样
+    """
+
+    def __init__(self, fig, ax, canvas, xlabel, ylabel, price_format, grid_color=None, downsample='lttb'):
+        self.fig = fig
+        self.ax = ax
+        self.canvas = canvas
+        self.price_format = price_format  # 最新价标注格式，如 '¥{:.2f}'
+        self.key = None                   # 当前显示的标的
+        self.background = None            # 整图重绘后缓存的背景
+        self.downsample = downsample      # 降采样方法（见 modules.downsample.DOWNSAMPLERS）
+        self.cache = DownsampleCache()
+
+        # 持久化的折线和标注（animated=True 表示不参与整图绘制，由 blitting 单独绘制）
+        self.line, = ax.plot([], [], 'b-', linewidth=1, animated=True)
+        self.annotation = ax.annotate('', xy=(0, 0),
+                                      xytext=(10, 10), textcoords='offset points',
+                                      bbox=dict(boxstyle='round,pad=0.5', fc='yellow', alpha=0.5),
+                                      arrowprops=dict(arrowstyle='->'),
+                                      animated=True)
+        self.annotation.set_visible(False)
+
+        # 坐标轴、网格和时间格式只设置一次
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        ax.xaxis_date()
+        ax.xaxis.set_major_formatter(DateFormatter('%m-%d %H:%M'))  # 游戏时间跨越多天
+        self.set_grid_color(grid_color)
+
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def set_grid_color(self, color=None):
+        """设置网格颜色并整图重绘"""
+        if color is None:
+            self.ax.grid(True)
+        else:
+            self.ax.grid(True, color=color, alpha=0.2)
+        self.canvas.draw_idle()
+
+    def query_points(self):
+        """查询走势时的点数上限（随坐标轴像素宽度变化）"""
+        return max(int(self.ax.bbox.width), 3) * CHART_OVERSAMPLE
+
+    def update(self, key, title, times, prices):
+        """更新走势图，times 为 datetime64 数组，prices 为价格数组"""
+        if len(prices) == 0:
+            return
+
+        # 约每个像素一个点
+        times, prices = self.cache.get(key, times, prices, max(int(self.ax.bbox.width), 3), self.downsample)
+        x = mdates.date2num(times)
+        last_x, last_price = x[-1], float(prices[-1])
+        self.line.set_data(x, prices)
+        self.annotation.xy = (last_x, last_price)
+        self.annotation.set_text(self.price_format.format(last_price))
+        self.annotation.set_visible(True)
+
+        # 切换标的时更新标题并重设坐标范围
+        full_redraw = key != self.key
+        if full_redraw:
+            self.key = key
+            self.ax.set_title(title)
+
+        # 价格超出当前纵轴范围时才重新缩放
+        low, high = self.ax.get_ylim()
+        min_price, max_price = float(prices.min()), float(prices.max())
+        if full_redraw or min_price < low or max_price > high:
+            padding = (max_price - min_price) * 0.1 or abs(max_price) * 0.01 or 1.0
+            self.ax.set_ylim(min_price - padding, max_price + padding)
+            full_redraw = True
+
+        # 横轴右侧预留余量，数据越界或左侧留白过多时才重新设置
+        left, right = self.ax.get_xlim()
+        span = x[-1] - x[0]
+        if full_redraw or last_x > right or x[0] < left or x[0] - left > span * 0.5:
+            margin = max(span * 0.2, 1 / 1440)  # 至少预留1分钟
+            self.ax.set_xlim(x[0], last_x + margin)
+            full_redraw = True
+
+        if full_redraw or self.background is None:
+            self.canvas.draw_idle()
+        else:
+            self._blit()
+
+    def _draw_animated(self):
+        self.fig.draw_artist(self.line)
+        self.fig.draw_artist(self.annotation)
+
+    def _on_draw(self, event):
+        """整图重绘后缓存背景并补画动态元素"""
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+
+    def _blit(self):
+        """恢复缓存的背景，只重画折线和标注"""
+        self.canvas.restore_region(self.background)
+        self._draw_animated()
+        self.canvas.blit(self.fig.bbox)
@@ -1,28 +1,34 @@
 import random
-from datetime import datetime, timedelta
+from datetime import timedelta
 import math
+import numpy as np
+from modules.history import PriceHistory
+from modules.market_engine import sentiment_path
+from modules.rng import default_rng, python_random
 
 class Cryptocurrency:
-    def __init__(self, symbol, name, initial_price, volatility=0.02):
+    def __init__(self, symbol, name, initial_price, volatility=0.02, clock=None, random_source=None):
         self.symbol = symbol
         self.name = name
         self.price = float(initial_price)
         self.initial_price = float(initial_price)
         self.volatility = volatility
         self.volume_24h = 0
-        self.price_history = [(datetime.now(), self.price)]
+        self.price_history = PriceHistory(1440, clock=clock)  # 保留24小时的分钟数据
+        self.price_history.append(self.price)
+        self.random = random_source if random_source is not None else random.Random()  # 由市场传入，保证可复现
         
         # 趋势参数
-        self.trend = random.uniform(-0.0002, 0.0002)
+        self.trend = self.random.uniform(-0.0002, 0.0002)
         self.momentum = 0
         
     def update_price(self, market_sentiment=0):
         """更新价格"""
         # 基础波动
-        change = random.normalvariate(self.trend, self.volatility)
+        change = self.random.normalvariate(self.trend, self.volatility)
         
         # 市场情绪影响
-        change += market_sentiment * random.uniform(1.5, 2.5)
+        change += market_sentiment * self.random.uniform(1.5, 2.5)
         
         # 动量影响
         self.momentum = self.momentum * 0.95 + change * 0.05
@@ -35,39 +41,77 @@ class Cryptocurrency:
         self.price = max(self.price, self.initial_price * 0.01)
         
         # 更新24小时交易量
-        self.volume_24h = self.price * random.uniform(1000, 10000)
+        self.volume_24h = self.price * self.random.uniform(1000, 10000)
         
         # 记录历史
-        self.price_history.append((datetime.now(), self.price))
-        if len(self.price_history) > 1440:  # 保留24小时的分钟数据
-            self.price_history.pop(0)
+        self.price_history.append(self.price)
 
 class CryptoMarket:
-    def __init__(self):
+    def __init__(self, clock=None, rng=None):
+        self.rng = default_rng(rng)
+        self.random = python_random(self.rng)  # 逐 tick 标量抽样用
         self.cryptos = {
-            'BTC': Cryptocurrency("BTC", "BitCoinage", 45000, 0.02),
-            'ETH': Cryptocurrency("ETH", "Etherium", 3000, 0.025),
-            'DOGE': Cryptocurrency("DOGE", "DogeCoinage", 0.2, 0.05),
-            'XRP': Cryptocurrency("XRP", "RippCoin", 0.5, 0.03),
-            'LTC': Cryptocurrency("LTC", "LiteCoinage", 100, 0.035)
+            'BTC': Cryptocurrency("BTC", "BitCoinage", 45000, 0.02, clock, self.random),
+            'ETH': Cryptocurrency("ETH", "Etherium", 3000, 0.025, clock, self.random),
+            'DOGE': Cryptocurrency("DOGE", "DogeCoinage", 0.2, 0.05, clock, self.random),
+            'XRP': Cryptocurrency("XRP", "RippCoin", 0.5, 0.03, clock, self.random),
+            'LTC': Cryptocurrency("LTC", "LiteCoinage", 100, 0.035, clock, self.random)
         }
         self.market_sentiment = 0
     
     def update_market(self):
         """更新市场"""
         # 更新市场情绪
-        self.market_sentiment = self.market_sentiment * 0.95 + random.normalvariate(0, 0.01)
+        self.market_sentiment = self.market_sentiment * 0.95 + self.random.normalvariate(0, 0.01)
         
         # 随机事件
-        if random.random() < 0.01:  # 1%概率发生重大事件
-            self.market_sentiment += random.uniform(-0.1, 0.1)
+        if self.random.random() < 0.01:  # 1%概率发生重大事件
+            self.market_sentiment += self.random.uniform(-0.1, 0.1)
         
         # 更新所有加密货币价格
         for crypto in self.cryptos.values():
             crypto.update_price(self.market_sentiment)
+    
+    def advance(self, timestamps):
+        """批量推进多个 tick（与逐次调用 update_market 同分布），timestamps 为每个 tick 的时间戳"""
+        ticks = len(timestamps)
+        cryptos = list(self.cryptos.values())
+        count = len(cryptos)
+        
+        # 市场情绪序列（含1%概率的重大事件）
+        rng = self.rng
+        shocks = rng.normal(0, 0.01, ticks)
+        shocks += np.where(rng.random(ticks) < 0.01, rng.uniform(-0.1, 0.1, ticks), 0)
+        sentiments = sentiment_path(self.market_sentiment, shocks)
+        self.market_sentiment = float(sentiments[-1])
+        
+        # 与价格路径无关的部分一次性生成：基础波动 + 情绪影响
+        trend = np.array([c.trend for c in cryptos])
+        volatility = np.array([c.volatility for c in cryptos])
+        change = rng.normal(trend, volatility, (ticks, count))
+        change += sentiments[:, np.newaxis] * rng.uniform(1.5, 2.5, (ticks, count))
+        
+        price = np.array([c.price for c in cryptos])
+        momentum = np.array([c.momentum for c in cryptos])
+        floor = np.array([c.initial_price for c in cryptos]) * 0.01
+        path = np.empty((ticks, count))
+        for t in range(ticks):
+            # 动量影响
+            momentum = momentum * 0.95 + change[t] * 0.05
+            price = np.maximum(price * (1 + change[t] + momentum), floor)
+            path[t] = price
+        
+        volume = price * rng.uniform(1000, 10000, count)
+        for i, crypto in enumerate(cryptos):
+            crypto.price = float(price[i])
+            crypto.momentum = float(momentum[i])
+            crypto.volume_24h = float(volume[i])
+            crypto.price_history.extend(timestamps, path[:, i])
 
 class CryptoWallet:
-    def __init__(self):
+    def __init__(self, rng=None):
+        self.rng = default_rng(rng)
+        self.random = python_random(self.rng)  # 质押收益率抽样用
         self.holdings = {}          # 持仓量
         self.staking = {}           # 质押量
         self.transaction_history = []  # 交易历史
@@ -144,7 +188,7 @@ class CryptoWallet:
         rewards = []
         for symbol, amount in self.staking.items():
             # 基础年化收益率5-15%
-            apy = random.uniform(0.05, 0.15)
+            apy = self.random.uniform(0.05, 0.15)
             daily_rate = apy / 365
             reward = amount * daily_rate
             
@@ -0,0 +1,115 @@
+from collections import OrderedDict
+import numpy as np
+
+def _bucket_edges(count, buckets):
+    """把下标 1..count-2 均分为 buckets 段，返回各段的起止下标"""
+    edges = np.linspace(1, count - 1, buckets + 1).astype(np.int64)
+    return edges[:-1], edges[1:]
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets 降采样，返回保留点的下标（含首尾两点）
+
+    标准 LTTB 以上一段选中的点为三角形顶点，只能逐段计算；
+    这里改用上一段的均值点，使所有分段可以一次性向量化计算，视觉效果基本一致
+    """
+    count = len(y)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    x = np.asarray(x)
+    if x.dtype.kind == 'M':
+        x = x.view(np.int64)  # datetime64 按纳秒整数计算
+    x = (x - x[0]).astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    starts, ends = _bucket_edges(count, threshold - 2)
+    sizes = ends - starts
+
+    # 各段均值点，作为相邻段三角形的顶点（首尾分别使用第一个和最后一个点）
+    mean_x = np.add.reduceat(x[:-1], starts) / sizes
+    mean_y = np.add.reduceat(y[:-1], starts) / sizes
+    prev_x = np.r_[x[0], mean_x[:-1]][:, np.newaxis]
+    prev_y = np.r_[y[0], mean_y[:-1]][:, np.newaxis]
+    next_x = np.r_[mean_x[1:], x[-1]][:, np.newaxis]
+    next_y = np.r_[mean_y[1:], y[-1]][:, np.newaxis]
+
+    # 各段补齐为等长的二维下标，补齐的位置面积记为 -1
+    index = starts[:, np.newaxis] + np.arange(sizes.max())
+    valid = index < ends[:, np.newaxis]
+    index = np.minimum(index, count - 2)
+    area = np.abs((prev_x - next_x) * (y[index] - prev_y) - (prev_x - x[index]) * (next_y - prev_y))
+    area[~valid] = -1
+
+    picked = index[np.arange(len(starts)), area.argmax(axis=1)]
+    return np.r_[0, picked, count - 1]
+
+def minmax_indices(x, y, threshold):
+    """最小/最大值包络降采样：每段保留最低点和最高点，不会丢失尖峰"""
+    count = len(y)
+    if threshold >= count or threshold < 4:
+        return np.arange(count)
+    y = np.asarray(y, dtype=np.float64)
+    starts, ends = _bucket_edges(count, (threshold - 2) // 2)
+    sizes = ends - starts
+    index = starts[:, np.newaxis] + np.arange(sizes.max())
+    valid = index < ends[:, np.newaxis]
+    index = np.minimum(index, count - 2)
+    values = y[index]
+    rows = np.arange(len(starts))
+    lows = index[rows, np.where(valid, values, np.inf).argmin(axis=1)]
+    highs = index[rows, np.where(valid, values, -np.inf).argmax(axis=1)]
+    # 每段内按时间先后排列两个点
+    picked = np.sort(np.stack([lows, highs], axis=1), axis=1).ravel()
+    return np.r_[0, picked, count - 1]
+
+# 降采样方法：名称 -> 返回保留点下标的函数
+DOWNSAMPLERS = {
+    'lttb': lttb_indices,
+    'minmax': minmax_indices,
+}
+
+def downsample(x, y, threshold, method='lttb'):
+    """把序列降到约 threshold 个点，返回 (x, y)"""
+    index = DOWNSAMPLERS[method](x, y, threshold)
+    return x[index], y[index]
+
+def merge_bars(bars, limit):
+    """把相邻K线合并，使根数不超过 limit，返回 (合并后的K线, 每根包含的原K线数)
+
+    bars 为 (起始时间, 开, 高, 低, 收, 量)，从最新一根向前分组，保证最新的K线完整
+    """
+    times, opens, highs, lows, closes, volumes = bars
+    count = len(times)
+    if limit <= 0 or count <= limit:
+        return bars, 1
+    factor = -(-count // limit)
+    starts = np.arange(count % factor, count, factor)
+    if starts[0]:
+        starts = np.r_[0, starts]
+    ends = np.r_[starts[1:], count]
+    merged = (times[starts], opens[starts],
+              np.maximum.reduceat(highs, starts), np.minimum.reduceat(lows, starts),
+              closes[ends - 1], np.add.reduceat(volumes, starts))
+    return merged, factor
+
+class DownsampleCache:
+    """降采样结果的 LRU 缓存，按 (序列, 时间窗口, 点数, 方法) 缓存
+
+    暂停或重绘（切换主题、调整窗口）时同一序列不需要重复计算
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+
+    def get(self, key, x, y, threshold, method='lttb'):
+        """取出 key 对应序列的降采样结果，未命中时计算并缓存"""
+        if len(y) <= threshold:
+            return x, y
+        cache_key = (key, int(x[0]), int(x[-1]), len(y), threshold, method)
+        if cache_key in self.entries:
+            self.entries.move_to_end(cache_key)
+            return self.entries[cache_key]
+        result = downsample(x, y, threshold, method)
+        self.entries[cache_key] = result
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return result
@@ -1,9 +1,18 @@
-import random
-from datetime import datetime, timedelta
+import heapq
+import json
+import math
+import os
+import numpy as np
+from modules.rng import default_rng
+
+# 默认事件目录（数据文件），场景设计者可以直接增删事件而无需改代码
+EVENT_CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "assets", "events.json")
+EVENT_CATEGORIES = ("market", "industry", "personal")
 
 class Event:
     def __init__(self, name, description, effect_description, effect_func, 
-                 probability=1.0, cooldown_days=7, tags=None):
+                 probability=1.0, cooldown_days=7, tags=None, industries=None):
         self.name = name
         self.description = description
         self.effect_description = effect_description
@@ -11,482 +20,259 @@ class Event:
         self.probability = probability  # 基础触发概率
         self.cooldown_days = cooldown_days  # 冷却时间
         self.tags = tags or []  # 事件标签
+        self.industries = industries or []  # 事件影响的行业（或行业标签）
         self.last_trigger_date = None  # 上次触发时间
 
+class PricePlan:
+    """事件价格效果的编译结果：受影响的行号以及每行的价格乘数
+
+    同一事件的所有全局、行业动作在编译时合并为一个乘数数组，
+    触发时只需一次批量写入；带随机分布的动作在触发时再抽样
+    """
+
+    def __init__(self, market, actions):
+        self.universe = market.stock_rows  # 编译时的股票列表，列表变化后需重新编译
+        count = len(market.stock_rows)
+        factors = np.ones(count)
+        touched = np.zeros(count, dtype=bool)
+        random_parts = []
+        for action in actions:
+            if action['scope'] == 'global':
+                rows = np.arange(count)
+            elif action['scope'] == 'industry':
+                rows = market.get_industry_rows(action['target'])
+            else:
+                continue
+            touched[rows] = True
+            if 'change' in action:
+                factors[rows] *= 1 + action['change']
+            else:
+                low, high = action['uniform']
+                random_parts.append((rows, low, high, action.get('per_stock', False)))
+
+        self.rows = np.flatnonzero(touched)
+        self.factors = factors[self.rows]
+        # 随机动作的行号换算为在 self.rows 中的位置
+        self.random_parts = [(np.searchsorted(self.rows, rows), low, high, per_stock)
+                             for rows, low, high, per_stock in random_parts]
+
+    def apply(self, market, rng):
+        """按计划批量调整价格，rng 为抽样随机动作用的 Generator"""
+        if not len(self.rows):
+            return
+        factors = self.factors
+        if self.random_parts:
+            factors = factors.copy()
+            for positions, low, high, per_stock in self.random_parts:
+                if per_stock:
+                    factors[positions] *= 1 + rng.uniform(low, high, len(positions))
+                else:
+                    factors[positions] *= 1 + rng.uniform(low, high)
+        market.apply_price_factors(self.rows, factors)
+
+def _action_value(action, rng):
+    """动作的取值：固定值 change 或均匀分布 uniform"""
+    if 'change' in action:
+        return action['change']
+    return float(rng.uniform(*action['uniform']))
+
+def compile_effect(actions, rng=None):
+    """把动作列表编译为事件效果函数 effect(player, market)，随机动作从 rng 抽样"""
+    rng = default_rng(rng)
+    price_actions = [a for a in actions if a['scope'] in ('global', 'industry')]
+    player_actions = [a for a in actions if a['scope'] in ('player_cash', 'player_cash_pct')]
+    compiled = {'plan': None}
+
+    def effect(player, market):
+        if price_actions:
+            plan = compiled['plan']
+            if plan is None or plan.universe is not market.stock_rows:
+                plan = compiled['plan'] = PricePlan(market, price_actions)
+            plan.apply(market, rng)
+        for action in player_actions:
+            if action['scope'] == 'player_cash':
+                player.cash += _action_value(action, rng)
+            else:
+                player.cash *= 1 + _action_value(action, rng)
+    return effect
+
+def _validate_action(name, action):
+    """检查动作格式，出错时抛出 ValueError"""
+    scope = action.get('scope')
+    if scope not in ('global', 'industry', 'player_cash', 'player_cash_pct'):
+        raise ValueError(f"事件 [{name}] 的动作范围无效: {scope}")
+    if scope == 'industry' and not action.get('target'):
+        raise ValueError(f"事件 [{name}] 的行业动作缺少 target")
+    if 'change' not in action:
+        uniform = action.get('uniform')
+        if not isinstance(uniform, list) or len(uniform) != 2:
+            raise ValueError(f"事件 [{name}] 的动作需要 change 或 uniform: [下限, 上限]")
+
+def load_event_catalog(path=EVENT_CATALOG, rng=None):
+    """读取事件目录，返回 [(分类, Event), ...]，事件效果的随机动作从 rng 抽样"""
+    with open(path, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+
+    events = []
+    for data in catalog['events']:
+        name = data['name']
+        category = data.get('category', 'market')
+        if category not in EVENT_CATEGORIES:
+            raise ValueError(f"事件 [{name}] 的分类无效: {category}")
+        actions = data.get('actions', [])
+        for action in actions:
+            _validate_action(name, action)
+
+        events.append((category, Event(
+            name,
+            data['description'],
+            data['effect_description'],
+            compile_effect(actions, rng),
+            probability=data.get('probability', 1.0),
+            cooldown_days=data.get('cooldown_days', 7),
+            tags=data.get('tags'),
+            industries=[a['target'] for a in actions if a['scope'] == 'industry']
+        )))
+    return events
+
 class EventSystem:
-    def __init__(self):
+    def __init__(self, catalog_path=EVENT_CATALOG, rng=None):
+        self.catalog_path = catalog_path  # 事件目录文件路径
+        self.rng = default_rng(rng)  # 触发调度和事件效果共用的随机数流
         self.events = []  # 所有可能的事件
         self.event_history = []  # 已发生的事件记录
         self.market_events = []  # 市场相关事件
         self.industry_events = []  # 行业相关事件
         self.personal_events = []  # 个人事件
+        self.max_events_per_day = 2  # 每天最多发生2个事件
+        
+        # 触发调度：堆中保存 (触发日序号, 事件序号, 事件)，每个事件只有一条记录
+        self._schedule = []
+        self._schedule_day = None     # 上次检查的日期序号
+        self._schedule_events = None  # 建堆时的事件列表，列表变化时重建
+        self._schedule_events_count = 0
         self.initialize_events()
     
+    
     def initialize_events(self):
-        """初始化所有事件"""
-        # 宏观经济事件
-        self.market_events.extend([
-            Event("央行降息", 
-                  "中央银行宣布降低基准利率0.25个百分点",
-                  "市场大幅上涨，金融股领涨", 
-                  lambda p, m: self._handle_rate_cut(m),
-                  probability=0.05,
-                  tags=["政策", "利率"]),
-                  
-            Event("央行降准", 
-                  "中央银行宣布下调存款准备金率0.5个百分点",
-                  "市场流动性改善，银行股上涨", 
-                  lambda p, m: self._handle_reserve_cut(m),
-                  probability=0.05,
-                  tags=["政策", "银行"]),
-                  
-            Event("外资流入", 
-                  "北向资金大幅净流入",
-                  "市场情绪高涨，蓝筹股表现强势", 
-                  lambda p, m: self._handle_foreign_capital(m),
-                  probability=0.1,
-                  tags=["资金", "外资"]),
-                  
-            Event("外资流出", 
-                  "北向资金大幅净流出",
-                  "市场承压，外资持股较多的股票调整", 
-                  lambda p, m: self._handle_foreign_outflow(m),
-                  probability=0.1,
-                  tags=["资金", "外资"]),
-                  
-            Event("经济数据向好", 
-                  "GDP、PMI等经济数据超预期",
-                  "周期股集体上涨", 
-                  lambda p, m: self._handle_good_economy(m),
-                  probability=0.08,
-                  tags=["经济", "数据"]),
-                  
-            Event("通胀超预期", 
-                  "CPI同比增速创新高",
-                  "市场避险情绪升温", 
-                  lambda p, m: self._handle_high_inflation(m),
-                  probability=0.06,
-                  tags=["经济", "通胀"]),
-                  
-            Event("美联储加息",
-                  "美联储宣布加息25个基点",
-                  "外资流出，市场承压",
-                  lambda p, m: self._handle_fed_rate_hike(m),
-                  probability=0.04,
-                  tags=["国际", "利率"]),
-                  
-            Event("国际贸易摩擦",
-                  "主要经济体之间贸易关系紧张",
-                  "出口相关行业承压",
-                  lambda p, m: self._handle_trade_friction(m),
-                  probability=0.05,
-                  tags=["国际", "贸易"]),
-                  
-            Event("全球供应链中断",
-                  "全球供应链出现严重中断",
-                  "制造业、物流行业受影响",
-                  lambda p, m: self._handle_supply_chain_disruption(m),
-                  probability=0.03,
-                  tags=["国际", "供应链"]),
-                  
-            Event("节日消费",
-                  "重要节日带动消费增长",
-                  "消费股、免税概念走强",
-                  lambda p, m: self._handle_holiday_consumption(m),
-                  probability=0.08,
-                  tags=["消费", "节日"]),
-                  
-            Event("极端天气",
-                  "极端天气影响生产生活",
-                  "保险、农业股波动",
-                  lambda p, m: self._handle_extreme_weather(m),
-                  probability=0.05,
-                  tags=["天气", "农业"]),
-                  
-            Event("季节性疫情",
-                  "季节性疫情发生",
-                  "医药股、在线经济受关注",
-                  lambda p, m: self._handle_seasonal_epidemic(m),
-                  probability=0.06,
-                  tags=["疫情", "医药"])
-        ])
-        
-        # 产业政策事件
-        self.industry_events.extend([
-            Event("新能源补贴", 
-                  "新能源汽车补贴政策延续",
-                  "新能源车产业链集体上涨", 
-                  lambda p, m: self._handle_industry_policy(m, "新能源车", 0.06),
-                  probability=0.1,
-                  tags=["政策", "新能源"]),
-                  
-            Event("医保谈判", 
-                  "医保药品谈判结果公布",
-                  "医药股分化", 
-                  lambda p, m: self._handle_medical_insurance(m),
-                  probability=0.08,
-                  tags=["医药", "政策"]),
-                  
-            Event("芯片突破", 
-                  "国产芯片取得重大技术突破",
-                  "半导体板块集体大涨", 
-                  lambda p, m: self._handle_tech_breakthrough(m, "半导体", 0.08),
-                  probability=0.05,
-                  tags=["科技", "半导体"]),
-                  
-            Event("房地产调控", 
-                  "多地出台房地产调控政策",
-                  "地产股和建材股承压", 
-                  lambda p, m: self._handle_real_estate_policy(m),
-                  probability=0.1,
-                  tags=["房地产", "政策"]),
-                  
-            Event("AI突破",
-                  "人工智能领域取得重大突破",
-                  "科技股集体走强",
-                  lambda p, m: self._handle_ai_breakthrough(m),
-                  probability=0.06,
-                  tags=["科技", "AI"]),
-                  
-            Event("新能源技术革新",
-                  "新型电池技术取得突破",
-                  "新能源产业链上涨",
-                  lambda p, m: self._handle_energy_innovation(m),
-                  probability=0.05,
-                  tags=["科技", "新能源"]),
-                  
-            Event("生物医药突破",
-                  "新药研发取得重大进展",
-                  "医药股表现活跃",
-                  lambda p, m: self._handle_biotech_breakthrough(m),
-                  probability=0.04,
-                  tags=["科技", "医药"]),
-                  
-            Event("产业升级",
-                  "传统产业加速数字化转型",
-                  "科技服务股走强",
-                  lambda p, m: self._handle_industry_upgrade(m),
-                  probability=0.07,
-                  tags=["产业", "科技"]),
-                  
-            Event("环保督查",
-                  "环保督查行动开展",
-                  "高污染行业承压，环保股上涨",
-                  lambda p, m: self._handle_environmental_inspection(m),
-                  probability=0.06,
-                  tags=["环保", "政策"]),
-                  
-            Event("产能过剩",
-                  "部分行业产能过剩问题突出",
-                  "相关行业股票调整",
-                  lambda p, m: self._handle_overcapacity(m),
-                  probability=0.05,
-                  tags=["产业", "产能"])
-        ])
-        
-        # 突发事件
-        self.market_events.extend([
-            Event("地缘冲突",
-                  "全球重要地区发生地缘政治冲突",
-                  "避险情绪升温，国防军工股上涨",
-                  lambda p, m: self._handle_geopolitical_event(m),
-                  probability=0.03,
-                  tags=["国际", "冲突"]),
-                  
-            Event("自然灾害",
-                  "某地区发生重大自然灾害",
-                  "保险股和基建股表现活跃",
-                  lambda p, m: self._handle_natural_disaster(m),
-                  probability=0.02,
-                  tags=["灾害", "保险"]),
-                  
-            Event("重大事故",
-                  "某行业发生重大安全事故",
-                  "相关行业股票调整",
-                  lambda p, m: self._handle_major_accident(m),
-                  probability=0.02,
-                  tags=["事故", "安全"])
-        ])
-        
-        # 公司事件
-        self.market_events.extend([
-            Event("重大收购",
-                  "大型公司宣布重要收购计划",
-                  "并购重组概念股活跃",
-                  lambda p, m: self._handle_major_acquisition(m),
-                  probability=0.05,
-                  tags=["公司", "并购"]),
-                  
-            Event("业绩预警",
-                  "多家公司发布业绩预警",
-                  "相关个股承压",
-                  lambda p, m: self._handle_profit_warning(m),
-                  probability=0.08,
-                  tags=["公司", "业绩"]),
-                  
-            Event("研发突破",
-                  "龙头公司取得重要研发突破",
-                  "相关概念股走强",
-                  lambda p, m: self._handle_research_breakthrough(m),
-                  probability=0.06,
-                  tags=["公司", "研发"])
-        ])
-        
-        # 个人事件
-        self.personal_events.extend([
-            Event("意外收入", 
-                  "收到一笔意外理财收益",
-                  "获得5000元现金", 
-                  lambda p, m: self._handle_cash_bonus(p, 5000),
-                  probability=0.05,
-                  tags=["收入", "理财"]),
-                  
-            Event("投资课程", 
-                  "参加高级投资培训",
-                  "获得一条有价值的投资建议", 
-                  lambda p, m: self._handle_investment_tip(p),
-                  probability=0.1,
-                  tags=["学习", "技能"]),
-                  
-            Event("市场内幕",
-                  "获得一条市场内幕消息",
-                  "对某个行业有了新的认识",
-                  lambda p, m: self._handle_market_insight(p),
-                  probability=0.08,
-                  tags=["信息", "内幕"]),
-                  
-            Event("操作失误",
-                  "交易操作出现失误",
-                  "损失一部分资金",
-                  lambda p, m: self._handle_operation_mistake(p),
-                  probability=0.05,
-                  tags=["风险", "操作"])
-        ])
+        """从事件目录加载所有事件"""
+        categories = {
+            'market': self.market_events,      # 宏观经济、突发及公司事件
+            'industry': self.industry_events,  # 产业政策事件
+            'personal': self.personal_events   # 个人事件
+        }
+        for category, event in load_event_catalog(self.catalog_path, self.rng):
+            categories[category].append(event)
         
         # 合并所有事件
         self.events = self.market_events + self.industry_events + self.personal_events
     
+    def find_unmatched_industries(self, market):
+        """找出目标行业在市场中没有任何股票的事件，返回 {事件名: [行业, ...]}"""
+        unmatched = {}
+        for event in self.events:
+            missing = [industry for industry in event.industries
+                       if not len(market.get_industry_rows(industry))]
+            if missing:
+                unmatched[event.name] = missing
+        return unmatched
+    
+    def report_unmatched_industries(self, market):
+        """打印目标行业无法匹配任何股票的事件"""
+        unmatched = self.find_unmatched_industries(market)
+        for name, industries in unmatched.items():
+            print(f"事件 [{name}] 的目标行业没有匹配的股票: {', '.join(industries)}")
+        return unmatched
+    
     def check_events(self, player, market, current_date):
-        """检查并触发事件"""
-        triggered_events = []
+        """检查并触发事件
         
-        # 限制每天最多触发的事件数量
-        max_events_per_day = 2  # 每天最多发生2个事件
-        triggered_count = 0
+        每个事件的下次触发日期按几何分布预先抽样并放入堆中：
+        冷却结束后每天以 probability 的概率触发，等价于从冷却结束当天起
+        抽样一个几何分布的等待天数。每天只需弹出到期的事件，
+        而不必对所有事件逐一抽签
+        """
+        today = current_date.toordinal()
         
-        # 随机打乱事件列表,使得触发更随机
-        potential_events = self.events.copy()
-        random.shuffle(potential_events)
+        # 首次检查、事件列表变化或日期倒退（例如读档）时重建调度
+        if (self._schedule_events is not self.events
+                or self._schedule_events_count != len(self.events)
+                or self._schedule_day is None or today < self._schedule_day):
+            self._build_schedule(today)
+        self._schedule_day = today
         
-        for event in potential_events:
-            # 如果已经触发足够多的事件,就停止检查
-            if triggered_count >= max_events_per_day:
-                break
-            
-            # 检查冷却时间
-            if (event.last_trigger_date and 
-                (current_date - event.last_trigger_date).days < event.cooldown_days):
+        # 取出今天到期的事件
+        due = []
+        while self._schedule and self._schedule[0][0] <= today:
+            day, index, event = heapq.heappop(self._schedule)
+            if day < today:
+                # 中间有未检查的日期（例如跳过了若干天），从今天起重新抽样
+                self._schedule_event(index, event, today)
                 continue
+            due.append((index, event))
+        
+        # 到期事件超过每天上限时随机选取，其余的从明天起重新抽样
+        self.rng.shuffle(due)
+        triggered_events = []
+        for index, event in due[self.max_events_per_day:]:
+            self._schedule_event(index, event, today + 1)
+        
+        for index, event in due[:self.max_events_per_day]:
+            # 执行事件效果
+            event.effect(player, market)
+            event.last_trigger_date = current_date
+            self._schedule_event(index, event, today + event.cooldown_days)
             
-            # 根据概率触发事件
-            if random.random() < event.probability:
-                # 执行事件效果
-                event.effect(player, market)
-                event.last_trigger_date = current_date
-                
-                # 记录事件
-                event_record = {
-                    'date': current_date,
-                    'name': event.name,
-                    'description': event.description,
-                    'effect': event.effect_description
-                }
-                self.event_history.append(event_record)
-                triggered_events.append(event_record)
-                
-                # 增加已触发事件计数
-                triggered_count += 1
+            # 记录事件
+            event_record = {
+                'date': current_date,
+                'name': event.name,
+                'description': event.description,
+                'effect': event.effect_description
+            }
+            self.event_history.append(event_record)
+            triggered_events.append(event_record)
         
         return triggered_events
     
-    # 事件处理方法
-    def _handle_rate_cut(self, market):
-        """处理降息事件"""
-        market.apply_global_change(0.03)  # 整体上涨3%
-        self._boost_industry(market, "银行", 0.05)  # 银行股额外上涨5%
-        self._boost_industry(market, "券商", 0.04)  # 券商股额外上涨4%
-    
-    def _handle_reserve_cut(self, market):
-        """处理降准事件"""
-        market.apply_global_change(0.02)  # 整体上涨2%
-        self._boost_industry(market, "银行", 0.04)  # 银行股额外上涨4%
-    
-    def _handle_foreign_capital(self, market):
-        """处理外资流入事件"""
-        market.apply_global_change(0.02)  # 整体上涨2%
-        self._boost_industry(market, "消费", 0.03)  # 消费股额外上涨3%
-    
-    def _handle_foreign_outflow(self, market):
-        """处理外资流出事件"""
-        market.apply_global_change(-0.02)  # 整体下跌2%
-        self._boost_industry(market, "消费", -0.03)  # 消费股额外下跌3%
-    
-    def _handle_good_economy(self, market):
-        """处理经济向好事件"""
-        market.apply_global_change(0.02)
-        industries = ["周期", "基建", "消费"]
-        for industry in industries:
-            self._boost_industry(market, industry, random.uniform(0.02, 0.04))
-    
-    def _handle_high_inflation(self, market):
-        """处理通胀事件"""
-        market.apply_global_change(-0.01)
-        self._boost_industry(market, "黄金", 0.03)
-        self._boost_industry(market, "消费", -0.02)
-    
-    def _handle_tech_breakthrough(self, market, industry, change):
-        """处理技术突破事件"""
-        self._boost_industry(market, industry, change)
-    
-    def _handle_industry_policy(self, market, industry, change):
-        """处理行业政策事件"""
-        self._boost_industry(market, industry, change)
-    
-    def _handle_cash_bonus(self, player, amount):
-        """处理现金奖励事件"""
-        player.cash += amount
-    
-    def _handle_investment_tip(self, player):
-        """处理投资建议事件"""
-        # TODO: 实现具体的投资建议逻辑
-        pass
-    
-    def _handle_medical_insurance(self, market):
-        """处理医保谈判事件"""
-        stocks = [s for s in market.stocks.values() if s.industry in ["医药", "医疗器械"]]
-        for stock in stocks:
-            change = random.uniform(-0.05, 0.05)  # 医药股分化
-            stock.price *= (1 + change)
-            stock.price_history.append((datetime.now(), stock.price))
-    
-    def _handle_real_estate_policy(self, market):
-        """处理房地产调控事件"""
-        self._boost_industry(market, "房地产", -0.03)
-        self._boost_industry(market, "建材", -0.02)
-        self._boost_industry(market, "银行", -0.01)
-    
-    def _handle_geopolitical_event(self, market):
-        """处理地缘冲突事件"""
-        market.apply_global_change(-0.01)
-        self._boost_industry(market, "军工", 0.05)
-        self._boost_industry(market, "石油", 0.03)
-    
-    def _handle_natural_disaster(self, market):
-        """处理自然灾害事件"""
-        market.apply_global_change(-0.01)  # 整体下跌1%
-        self._boost_industry(market, "保险", 0.02)  # 保险股额外上涨2%
-        self._boost_industry(market, "基建", 0.01)  # 基建股额外上涨1%
-    
-    def _handle_major_accident(self, market):
-        """处理重大事故事件"""
-        market.apply_global_change(-0.01)  # 整体下跌1%
-        self._boost_industry(market, "安全", -0.02)  # 安全股额外下跌2%
-    
-    def _handle_major_acquisition(self, market):
-        """处理重大收购事件"""
-        market.apply_global_change(0.02)  # 整体上涨2%
-        self._boost_industry(market, "并购重组概念股", 0.05)  # 并购重组概念股额外上涨5%
-    
-    def _handle_profit_warning(self, market):
-        """处理业绩预警事件"""
-        market.apply_global_change(-0.01)  # 整体下跌1%
-        self._boost_industry(market, "业绩预警股", -0.02)  # 业绩预警股额外下跌2%
-    
-    def _handle_research_breakthrough(self, market):
-        """处理研发突破事件"""
-        market.apply_global_change(0.01)  # 整体上涨1%
-        self._boost_industry(market, "研发突破股", 0.02)  # 研发突破股额外上涨2%
-    
-    def _handle_market_insight(self, player):
-        """处理市场内幕事件"""
-        # TODO: 实现具体的市场内幕逻辑
-        pass
-    
-    def _handle_operation_mistake(self, player):
-        """处理操作失误事件"""
-        loss = player.cash * random.uniform(0.01, 0.05)  # 损失1-5%的现金
-        player.cash -= loss
-    
-    def _handle_fed_rate_hike(self, market):
-        """处理美联储加息事件"""
-        market.apply_global_change(-0.02)
-        self._boost_industry(market, "银行", 0.02)
-        self._boost_industry(market, "出口", -0.03)
-    
-    def _handle_trade_friction(self, market):
-        """处理贸易摩擦事件"""
-        market.apply_global_change(-0.02)
-        self._boost_industry(market, "出口", -0.04)
-        self._boost_industry(market, "内需", 0.02)
-    
-    def _handle_supply_chain_disruption(self, market):
-        """处理供应链中断事件"""
-        self._boost_industry(market, "制造业", -0.03)
-        self._boost_industry(market, "物流", -0.02)
-        self._boost_industry(market, "本土供应链", 0.03)
-    
-    def _handle_holiday_consumption(self, market):
-        """处理节日消费事件"""
-        self._boost_industry(market, "消费", 0.03)
-        self._boost_industry(market, "免税", 0.04)
-        self._boost_industry(market, "旅游", 0.03)
-    
-    def _handle_extreme_weather(self, market):
-        """处理极端天气事件"""
-        self._boost_industry(market, "农业", random.uniform(-0.05, 0.05))
-        self._boost_industry(market, "保险", 0.02)
-    
-    def _handle_seasonal_epidemic(self, market):
-        """处理季节性疫情事件"""
-        market.apply_global_change(-0.01)  # 整体下跌1%
-        self._boost_industry(market, "医药股", -0.02)  # 医药股额外下跌2%
-        self._boost_industry(market, "在线经济", 0.01)  # 在线经济股额外上涨1%
-    
-    def _handle_ai_breakthrough(self, market):
-        """处理AI突破事件"""
-        self._boost_industry(market, "人工智能", 0.05)
-        self._boost_industry(market, "芯片", 0.03)
-        self._boost_industry(market, "软件", 0.02)
-    
-    def _handle_energy_innovation(self, market):
-        """处理新能源技术革新事件"""
-        self._boost_industry(market, "新能源", 0.04)
-        self._boost_industry(market, "电池", 0.05)
-        self._boost_industry(market, "新材料", 0.03)
-    
-    def _handle_biotech_breakthrough(self, market):
-        """处理生物医药突破事件"""
-        self._boost_industry(market, "医药股", 0.01)  # 医药股额外上涨1%
-    
-    def _handle_industry_upgrade(self, market):
-        """处理产业升级事件"""
-        self._boost_industry(market, "科技服务", 0.04)
-        self._boost_industry(market, "自动化", 0.03)
-        self._boost_industry(market, "传统制造", -0.02)
-    
-    def _handle_environmental_inspection(self, market):
-        """处理环保督查事件"""
-        self._boost_industry(market, "高污染", -0.03)
-        self._boost_industry(market, "环保", 0.04)
-        self._boost_industry(market, "新能源", 0.02)
-    
-    def _handle_overcapacity(self, market):
-        """处理产能过剩事件"""
-        self._boost_industry(market, "产能过剩股", -0.01)  # 产能过剩股额外下跌1%
-    
-    def _boost_industry(self, market, industry, change):
-        """提升特定行业股票"""
-        for stock in market.stocks.values():
-            if stock.industry == industry:
-                stock.price *= (1 + change)
-                stock.price_history.append((datetime.now(), stock.price)) 
\ No newline at end of file
+    def export_schedule(self):
+        """导出触发调度：上次检查的日期序号和各事件的下次触发日 [[日期序号, 事件名], ...]"""
+        return {
+            'day': self._schedule_day,
+            'pending': sorted([day, event.name] for day, _, event in self._schedule),
+        }
+    
+    def import_schedule(self, state):
+        """恢复 export_schedule 导出的调度，不重新抽样；事件目录与存档不一致时留待下次检查时重建"""
+        indices = {event.name: index for index, event in enumerate(self.events)}
+        pending = [(day, indices.get(name)) for day, name in state['pending']]
+        scheduled = {index for index, event in enumerate(self.events) if event.probability > 0}
+        if state['day'] is None or sorted(index for _, index in pending if index is not None) != sorted(scheduled):
+            self._schedule_events = None
+            return
+        self._schedule = [(day, index, self.events[index]) for day, index in pending]
+        heapq.heapify(self._schedule)
+        self._schedule_events = self.events
+        self._schedule_events_count = len(self.events)
+        self._schedule_day = state['day']
+    
+    def _build_schedule(self, today):
+        """为所有事件抽样下次触发日期"""
+        self._schedule = []
+        self._schedule_events = self.events
+        self._schedule_events_count = len(self.events)
+        for index, event in enumerate(self.events):
+            start = today
+            if event.last_trigger_date:
+                start = max(today, event.last_trigger_date.toordinal() + event.cooldown_days)
+            self._schedule_event(index, event, start)
+    
+    def _schedule_event(self, index, event, start):
+        """从 start 这一天起按几何分布抽样事件的触发日期并入堆"""
+        if event.probability <= 0:
+            return  # 永不触发
+        wait = 0
+        if event.probability < 1:
+            # 几何分布：连续失败的天数
+            wait = int(math.log(1.0 - self.rng.random()) / math.log(1.0 - event.probability))
+        heapq.heappush(self._schedule, (start + wait, index, event))
@@ -1,9 +1,12 @@
 from datetime import datetime, timedelta
 import random
 import math
+import numpy as np
+from modules.market_engine import sentiment_path
+from modules.rng import default_rng, python_random
 
 class Currency:
-    def __init__(self, code, name, rate_to_usd, volatility=0.001):
+    def __init__(self, code, name, rate_to_usd, volatility=0.001, random_source=None):
         self.code = code
         self.name = name
         self.rate_to_usd = float(rate_to_usd)  # 对美元汇率
@@ -12,11 +15,15 @@ class Currency:
         self.rate_history = [(datetime.now(), rate_to_usd)]
         
         # 趋势参数
-        self.trend = random.uniform(-0.0001, 0.0001)
+        self.random = random_source if random_source is not None else random.Random()
+        self.trend = self.random.uniform(-0.0001, 0.0001)
         self.momentum = 0
 
 class ForexMarket:
-    def __init__(self):
+    def __init__(self, rng=None):
+        self.rng = default_rng(rng)
+        self.random = python_random(self.rng)  # 逐 tick 标量抽样用
+        
         # 初始化汇率
         self.rates = {
             'USD': 1.0,      # 基准货币
@@ -53,15 +60,28 @@ class ForexMarket:
     def update_market(self):
         """更新外汇市场"""
         # 更新市场情绪
-        self.market_sentiment = self.market_sentiment * 0.95 + random.normalvariate(0, 0.01)
+        self.market_sentiment = self.market_sentiment * 0.95 + self.random.normalvariate(0, 0.01)
         
         # 更新每个货币对的汇率
         for currency in self.rates:
             if currency != 'USD':  # 跳过基准货币
                 volatility = self.volatilities.get(currency, 0.002)
-                change = random.normalvariate(0, volatility) + self.market_sentiment * 0.1
+                change = self.random.normalvariate(0, volatility) + self.market_sentiment * 0.1
                 self.rates[currency] *= (1 + change)
     
+    def advance(self, ticks):
+        """批量推进多个 tick（与逐次调用 update_market 同分布）"""
+        sentiments = sentiment_path(self.market_sentiment, self.rng.normal(0, 0.01, ticks))
+        self.market_sentiment = float(sentiments[-1])
+        
+        # 汇率每个 tick 的变化互不依赖，整段的累计涨跌即为各 tick 乘数之积
+        currencies = [c for c in self.rates if c != 'USD']
+        volatility = np.array([self.volatilities.get(c, 0.002) for c in currencies])
+        change = self.rng.normal(0, volatility, (ticks, len(currencies))) + sentiments[:, np.newaxis] * 0.1
+        factors = np.prod(1 + change, axis=0)
+        for currency, factor in zip(currencies, factors.tolist()):
+            self.rates[currency] *= factor
+    
     def get_rate(self, from_currency, to_currency):
         """获取货币对的汇率"""
         if from_currency == to_currency:
@@ -3,7 +3,10 @@ from tkinter import ttk
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-from matplotlib.dates import DateFormatter  # 修正 DateFormatter 导入
+from matplotlib.dates import DateFormatter
+from modules.charts import LivePriceChart, draw_candlesticks, CHART_RANGES
+from modules.history import DAY_NS, TICKS_PER_DAY
+from modules.lottery import random_tickets
 import tkinter.messagebox as messagebox
 import random
 from pygame import mixer  # 在文件开头添加
@@ -63,6 +66,13 @@ class GameUI:
         # 速度菜单
         self.main_menu.add_command(label="修改游戏速度", command=self.show_speed_settings)
         
+        # 快进菜单
+        skip_menu = tk.Menu(self.main_menu, tearoff=0)
+        skip_menu.add_command(label="快进一天", command=lambda: self.game.fast_forward(1))
+        skip_menu.add_command(label="快进一周", command=lambda: self.game.fast_forward(7))
+        skip_menu.add_command(label="快进一月", command=lambda: self.game.fast_forward(30))
+        self.main_menu.add_cascade(label="快进", menu=skip_menu)
+        
         # 设置菜单
         settings_menu = tk.Menu(self.main_menu, tearoff=0)
         settings_menu.add_command(label="切换主题", command=self.game.toggle_theme)
@@ -176,6 +186,10 @@ class GameUI:
         self.stock_tree.pack(side=tk.LEFT, fill=tk.Y)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
+        # 列表行以股票代码作为 item id，刷新时只修改价格变化的行
+        self.stock_row_prices = {}     # {code: 当前显示的价格文本}
+        self.stock_filter_text = None  # 当前已应用的搜索文本
+        
         # 绑定选择事件
         self.stock_tree.bind("<<TreeviewSelect>>", self.on_stock_select)
         
@@ -224,11 +238,20 @@ class GameUI:
         # K线图
         chart_frame = ttk.LabelFrame(frame, text="价格走势")
         chart_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.chart_range = self._create_range_selector(chart_frame, self.refresh_chart)
+        
+        # 使用支持中文的字体（需在创建文字元素前设置）
+        plt.rcParams['font.sans-serif'] = ['SimHei']  # 设置中文字体为黑体
+        plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
         
         self.fig = Figure(figsize=(6, 4))
         self.ax = self.fig.add_subplot(111)
         self.canvas = FigureCanvasTkAgg(self.fig, master=chart_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.price_chart = LivePriceChart(self.fig, self.ax, self.canvas,
+                                          xlabel="时间", ylabel="价格 (CNY)",
+                                          price_format='¥{:.2f}',
+                                          grid_color=self.game.theme_colors[self.game.current_theme]["fg"])
         
         # 交易控制
         control_frame = ttk.Frame(frame)
@@ -263,57 +286,67 @@ class GameUI:
         self.mood_label.pack(side=tk.RIGHT, padx=10)
         
     def update_stock_list(self):
-        """更新股票列表显示"""
-        # 清空现有列表
-        for item in self.stock_tree.get_children():
-            self.stock_tree.delete(item)
+        """更新股票列表显示（只更新显示价格发生变化的行）"""
+        market = self.game.stock_market
         
-        # 获取搜索文本
+        # 搜索文本或股票池变化时才重新过滤
         search_text = self.search_var.get().lower()
-        
-        # 添加所有股票
-        for stock in self.game.stock_market.get_all_stocks():  # 使用get_all_stocks()
-            # 如果有搜索文本，进行过滤
-            if (search_text in stock.code.lower() or 
-                search_text in stock.name.lower() or 
-                search_text in stock.industry.lower()):
-                self.stock_tree.insert("", tk.END, values=(
+        if (search_text != self.stock_filter_text or 
+                len(self.stock_row_prices) != len(market.stocks)):
+            self._apply_stock_filter(search_text)
+        
+        # 只对可见且价格文本变化的行调用 item()
+        for code in self.stock_tree.get_children():
+            stock = market.get_stock(code)
+            price_text = f"¥{stock.price:.2f}"
+            if self.stock_row_prices.get(code) != price_text:
+                self.stock_row_prices[code] = price_text
+                self.stock_tree.set(code, "现价", price_text)
+    
+    def _apply_stock_filter(self, search_text):
+        """按搜索文本显示或隐藏行，保留已有的行、选中项和滚动位置"""
+        market = self.game.stock_market
+        
+        # 删除已不在市场中的股票行
+        for code in [c for c in self.stock_row_prices if c not in market.stocks]:
+            self.stock_tree.delete(code)
+            del self.stock_row_prices[code]
+        
+        index = 0
+        for stock in market.get_all_stocks():
+            # 首次出现的股票插入一行
+            if stock.code not in self.stock_row_prices:
+                price_text = f"¥{stock.price:.2f}"
+                self.stock_tree.insert("", tk.END, iid=stock.code, values=(
                     stock.code,
                     stock.name,
                     stock.industry,
-                    f"¥{stock.price:.2f}"
+                    price_text
                 ))
-        
-    def filter_stocks(self, *args):
-        """过滤股票列表"""
-        # 清空现有列表
-        for item in self.stock_tree.get_children():
-            self.stock_tree.delete(item)
-        
-        # 获取搜索文本
-        search_text = self.search_var.get().lower()
-        
-        # 添加符合搜索条件的股票
-        for stock in self.game.stock_market.get_all_stocks():
+                self.stock_row_prices[stock.code] = price_text
+            
+            # 如果有搜索文本，进行过滤
             if (search_text in stock.code.lower() or 
                 search_text in stock.name.lower() or 
                 search_text in stock.industry.lower()):
-                self.stock_tree.insert("", tk.END, values=(
-                    stock.code,
-                    stock.name,
-                    stock.industry,
-                    f"¥{stock.price:.2f}"
-                ))
+                self.stock_tree.move(stock.code, "", index)
+                index += 1
+            else:
+                self.stock_tree.detach(stock.code)
+        
+        self.stock_filter_text = search_text
+        
+    def filter_stocks(self, *args):
+        """过滤股票列表"""
+        self.update_stock_list()
         
     def on_stock_select(self, event):
         """处理股票选择事件"""
         selected_items = self.stock_tree.selection()
         if selected_items:
-            # 获取选中项的值
-            item_values = self.stock_tree.item(selected_items[0])['values']
-            if item_values:
-                self.selected_stock = item_values[0]  # 获取股票代码
-                self.update_display()
+            # item id 即股票代码
+            self.selected_stock = selected_items[0]
+            self.update_display()
             
     def buy_stock(self):
         """买入股票"""
@@ -499,11 +532,16 @@ class GameUI:
         # K线图
         chart_frame = ttk.LabelFrame(detail_frame, text="价格走势")
         chart_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.crypto_chart_range = self._create_range_selector(chart_frame, self.update_crypto_display)
         
         self.crypto_fig = Figure(figsize=(6, 4))
         self.crypto_ax = self.crypto_fig.add_subplot(111)
         self.crypto_canvas = FigureCanvasTkAgg(self.crypto_fig, master=chart_frame)
         self.crypto_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        # 加密货币波动剧烈，降采样时用最小/最大值包络保留尖峰
+        self.crypto_chart = LivePriceChart(self.crypto_fig, self.crypto_ax, self.crypto_canvas,
+                                           xlabel="Time", ylabel="Price (USD)",
+                                           price_format='${:.2f}', downsample='minmax')
         
         # 交易控制
         control_frame = ttk.Frame(detail_frame)
@@ -569,34 +607,30 @@ class GameUI:
         self.update_crypto_chart(crypto)
 
     def update_crypto_chart(self, crypto):
-        """更新加密货币价格走势图"""
-        self.crypto_ax.clear()
-        if crypto.price_history:
-            times, prices = zip(*crypto.price_history)
-            self.crypto_ax.plot(times, prices, 'b-', linewidth=1)
-            
-            self.crypto_ax.set_title(f"{crypto.name} ({crypto.symbol})")
-            self.crypto_ax.set_ylabel("Price (USD)")
-            self.crypto_ax.grid(True)
-            
-            # 设置y轴范围
-            min_price = min(prices)
-            max_price = max(prices)
-            price_range = max_price - min_price
-            self.crypto_ax.set_ylim(min_price - price_range*0.1, max_price + price_range*0.1)
-            
-            # 设置x轴为时间格式
-            self.crypto_ax.xaxis.set_major_formatter(DateFormatter('%H:%M:%S'))
-            self.crypto_ax.set_xlabel("Time")
-            
-            # 添加最新价格标注
-            self.crypto_ax.annotate(f'${prices[-1]:.2f}', 
-                                   xy=(times[-1], prices[-1]),
-                                   xytext=(10, 10), textcoords='offset points',
-                                   bbox=dict(boxstyle='round,pad=0.5', fc='yellow', alpha=0.5),
-                                   arrowprops=dict(arrowstyle='->'))
-            
-            self.crypto_canvas.draw()
+        """更新加密货币价格走势图（增量刷新）"""
+        if len(crypto.price_history):
+            times, prices = self._chart_series(crypto.price_history, self.crypto_chart_range, self.crypto_chart)
+            self.crypto_chart.update((crypto.symbol, self.crypto_chart_range.get()),
+                                     f"{crypto.name} ({crypto.symbol})", times, prices)
+
+    def _create_range_selector(self, parent, command):
+        """在图表上方创建时间范围选择框"""
+        range_frame = ttk.Frame(parent)
+        range_frame.pack(fill=tk.X, padx=5)
+        ttk.Label(range_frame, text="范围:").pack(side=tk.LEFT)
+        range_var = tk.StringVar(value=next(iter(CHART_RANGES)))
+        range_box = ttk.Combobox(range_frame, textvariable=range_var, values=list(CHART_RANGES),
+                                 state="readonly", width=6)
+        range_box.pack(side=tk.LEFT, padx=5)
+        range_box.bind("<<ComboboxSelected>>", lambda e: command())
+        return range_var
+
+    def _chart_series(self, history, range_var, chart):
+        """按所选时间范围查询走势：点数上限随图表宽度变化，从覆盖窗口的最细层级取点，再由图表降采样"""
+        days = CHART_RANGES[range_var.get()]
+        end = int(history.timestamps()[-1])
+        start = None if days is None else end - days * DAY_NS
+        return history.query(start, None, chart.query_points())
 
     def buy_crypto(self):
         """买入加密货币"""
@@ -912,12 +946,12 @@ class GameUI:
             var.set(False)
         
         # 随机选择6个红球
-        red_numbers = random.sample(range(33), 6)
+        red_numbers = self.game.random.sample(range(33), 6)
         for num in red_numbers:
             self.red_vars[num].set(True)
         
         # 随机选择1个蓝球
-        blue_number = random.randint(0, 15)
+        blue_number = self.game.random.randint(0, 15)
         self.blue_vars[blue_number].set(True)
 
     def batch_buy(self):
@@ -940,15 +974,9 @@ class GameUI:
                                      f"每注金额: ¥2.00"):
                 return
             
-            # 生成投注号码
-            tickets = []
-            for _ in range(amount):
-                red_numbers = sorted(random.sample(range(1, 34), 6))
-                blue_number = random.randint(1, 16)
-                tickets.append((red_numbers, blue_number))
-            
-            # 添加到彩票系统
-            self.game.lottery.add_tickets(self.game.game_date, tickets)
+            # 批量生成投注号码（直接生成红球掩码和蓝球）并添加到彩票系统
+            masks, blues = random_tickets(self.game.rng, amount)
+            self.game.lottery.add_ticket_masks(self.game.game_date, masks, blues)
             
             # 扣除费用
             self.game.player.cash -= total_cost
@@ -986,32 +1014,26 @@ class GameUI:
             messagebox.showwarning("错误", "请至少选择1个蓝球！")
             return
         
-        # 计算注数和金额
-        tickets = []
-        if len(red_numbers) == 6 and len(blue_numbers) == 1:
-            # 单式投注
-            tickets.append((sorted(red_numbers), blue_numbers[0]))
-        else:
-            # 复式投注
-            from itertools import combinations
-            red_combinations = list(combinations(red_numbers, 6))
-            for red_combo in red_combinations:
-                for blue_number in blue_numbers:
-                    tickets.append((sorted(red_combo), blue_number))
-            amount = len(tickets)
-        
-        total_cost = amount * 2  # 每注2元
+        # 按组合数计算注数、金额和期望值，复式投注不展开为单注
+        analysis = self.game.lottery.analyze_bet(red_numbers, blue_numbers)
+        amount = analysis['tickets']
+        total_cost = analysis['cost']
         
         # 确认投注
         if messagebox.askyesno("确认投注", 
                               f"共 {amount} 注，总金额 ¥{total_cost:,.2f}\n"
+                              f"中奖概率: {analysis['win_probability']:.2%}\n"
+                              f"期望返奖: ¥{analysis['expected_return']:,.2f}\n"
                               "确认投注吗？"):
             if total_cost > self.game.player.cash:
                 messagebox.showwarning("错误", f"现金不足！需要 ¥{total_cost:,.2f}")
                 return
             
             # 添加到彩票系统
-            self.game.lottery.add_tickets(self.game.game_date, tickets)
+            if amount == 1:
+                self.game.lottery.add_tickets(self.game.game_date, [(sorted(red_numbers), blue_numbers[0])])
+            else:
+                self.game.lottery.add_compound_bet(self.game.game_date, red_numbers, blue_numbers)
             
             # 扣除费用
             self.game.player.cash -= total_cost
@@ -1049,24 +1071,47 @@ class GameUI:
         history_window.geometry("400x300")
         history_window.transient(self.root)
         
+        # 翻页按钮
+        log = self.game.lottery.claimed_prizes
+        page_size = 20
+        page_var = tk.IntVar(value=0)
+        nav_frame = ttk.Frame(history_window)
+        nav_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=5)
+        
         # 创建文本显示区域
         text = tk.Text(history_window, wrap=tk.WORD, width=50, height=15)
         text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # 显示已领取的奖金记录
-        total_claimed = 0
-        text.insert(tk.END, "== 历史中奖记录 ==\n\n")
-        for prize in self.game.lottery.claimed_prizes:
-            text.insert(tk.END, 
-                f"开奖日期: {prize['date'].strftime('%Y-%m-%d')}\n"
-                f"中奖等级: {prize['level']}等奖\n"
-                f"中奖金额: ¥{prize['amount']:,.2f}\n"
-                f"中奖号码: 红球 {prize['numbers'][0]}, 蓝球 {prize['numbers'][1]}\n"
-                f"{'-'*40}\n")
-            total_claimed += prize['amount']
-        
-        text.insert(tk.END, f"\n累计中奖金额: ¥{total_claimed:,.2f}")
-        text.config(state='disabled')
+        def render():
+            """只展开当前页的已领取奖金记录（最新的在前）"""
+            page = page_var.get()
+            text.config(state='normal')
+            text.delete(1.0, tk.END)
+            text.insert(tk.END, f"== 历史中奖记录（第 {page + 1}/{log.page_count(page_size)} 页）==\n\n")
+            for prize in log.page(page, page_size):
+                # 每条记录是一次开奖中同一等级的全部中奖票，号码只展开前几行
+                lines = "".join(f"  红球 {reds}, 蓝球 {blues}" + (f" x {count}注" if count > 1 else "") + "\n"
+                                for reds, blues, count in prize['numbers'][:5])
+                if sum(count for _, _, count in prize['numbers'][:5]) < prize['count']:
+                    lines += f"  ……共 {prize['count']} 注\n"
+                text.insert(tk.END, 
+                    f"开奖日期: {prize['date'].strftime('%Y-%m-%d')}\n"
+                    f"中奖等级: {prize['level']}等奖 x {prize['count']} 注\n"
+                    f"中奖金额: ¥{prize['amount']:,.2f}\n"
+                    f"中奖号码:\n{lines}"
+                    f"{'-'*40}\n")
+            
+            text.insert(tk.END, f"\n累计中奖金额: ¥{log.total_amount:,.2f}")
+            text.config(state='disabled')
+        
+        def turn(step):
+            page = min(max(page_var.get() + step, 0), log.page_count(page_size) - 1)
+            page_var.set(page)
+            render()
+        
+        ttk.Button(nav_frame, text="上一页", command=lambda: turn(-1)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(nav_frame, text="下一页", command=lambda: turn(1)).pack(side=tk.RIGHT, padx=5)
+        render()
 
     def show_forex(self):
         """显示货币兑换界面"""
@@ -1233,14 +1278,11 @@ class GameUI:
         # 获取点击位置对应的item
         item = self.stock_tree.identify_row(event.y)
         if item:
-            # 选中该项
+            # 选中该项（item id 即股票代码）
             self.stock_tree.selection_set(item)
-            # 获取股票代码
-            values = self.stock_tree.item(item)['values']
-            if values:
-                self.selected_stock = values[0]
-                # 在点击位置显示菜单
-                self.stock_menu.post(event.x_root, event.y_root)
+            self.selected_stock = item
+            # 在点击位置显示菜单
+            self.stock_menu.post(event.x_root, event.y_root)
 
     def show_kline(self):
         """显示K线图窗口"""
@@ -1255,20 +1297,39 @@ class GameUI:
         kline_window.title(f"{stock.name} - K线图")
         kline_window.geometry("800x600")
         
-        # 创建K线图
-        fig = Figure(figsize=(8, 6))
-        ax = fig.add_subplot(111)
-        
-        # 绘制K线
-        times, prices = zip(*stock.price_history)
-        ax.plot(times, prices, 'b-', linewidth=1)
-        ax.set_title(f"{stock.name} ({stock.code})")
-        ax.set_ylabel("价格 (CNY)")
-        ax.grid(True)
+        # 周期选择
+        periods = {"分时": ('tick', 1 / TICKS_PER_DAY), "日K": ('day', 1), "周K": ('week', 7)}
+        period_var = tk.StringVar(value="日K")
+        control_frame = ttk.Frame(kline_window)
+        control_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(control_frame, text="周期:").pack(side=tk.LEFT)
+        period_box = ttk.Combobox(control_frame, textvariable=period_var, values=list(periods),
+                                  state="readonly", width=8)
+        period_box.pack(side=tk.LEFT, padx=5)
         
+        # 创建K线图（上方K线，下方成交量）
+        fig = Figure(figsize=(8, 6))
+        ax = fig.add_axes([0.1, 0.35, 0.85, 0.58])
+        volume_ax = fig.add_axes([0.1, 0.08, 0.85, 0.2], sharex=ax)
         canvas = FigureCanvasTkAgg(fig, master=kline_window)
-        canvas.draw()
         canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        
+        def draw(event=None):
+            period, period_days = periods[period_var.get()]
+            ax.clear()
+            volume_ax.clear()
+            draw_candlesticks(ax, volume_ax, self.game.stock_market.get_bars(stock.code, period), period_days)
+            ax.set_title(f"{stock.name} ({stock.code}) {period_var.get()}")
+            ax.set_ylabel("价格 (CNY)")
+            ax.grid(True, alpha=0.3)
+            volume_ax.set_ylabel("成交量")
+            volume_ax.grid(True, alpha=0.3)
+            volume_ax.xaxis.set_major_formatter(DateFormatter('%m-%d %H:%M' if period == 'tick' else '%Y-%m-%d'))
+            ax.tick_params(labelbottom=False)
+            canvas.draw_idle()
+        
+        period_box.bind("<<ComboboxSelected>>", draw)
+        draw()
 
     def show_company_info(self):
         """显示公司信息窗口"""
@@ -1317,6 +1378,7 @@ class GameUI:
         self.ax.yaxis.label.set_color(colors['fg'])
         for text in self.ax.get_xticklabels() + self.ax.get_yticklabels():
             text.set_color(colors['fg'])
+        self.price_chart.set_grid_color(colors['fg'])
         
         # 更新其他文本组件
         self.info_text.configure(bg=colors['bg'], fg=colors['fg'])
@@ -1450,39 +1512,17 @@ class GameUI:
         for music in self.music_list:
             listbox.insert(tk.END, music)
 
+    def refresh_chart(self):
+        """重绘当前选中股票的走势图"""
+        if self.selected_stock:
+            self.update_chart(self.game.stock_market.get_stock(self.selected_stock))
+
     def update_chart(self, stock):
-        """更新股票图表"""
-        self.ax.clear()
-        if stock.price_history:
-            times, prices = zip(*stock.price_history)
-            self.ax.plot(times, prices, 'b-', linewidth=1)
-            
-            # 使用支持中文的字体
-            plt.rcParams['font.sans-serif'] = ['SimHei']  # 设置中文字体为黑体
-            plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
-            
-            self.ax.set_title(f"{stock.name} ({stock.code})")
-            self.ax.set_ylabel("价格 (CNY)")
-            self.ax.grid(True, color=self.game.theme_colors[self.game.current_theme]["fg"], alpha=0.2)
-            
-            # 设置y轴范围
-            min_price = min(prices)
-            max_price = max(prices)
-            price_range = max_price - min_price
-            self.ax.set_ylim(min_price - price_range*0.1, max_price + price_range*0.1)
-            
-            # 设置x轴为时间格式
-            self.ax.xaxis.set_major_formatter(DateFormatter('%H:%M:%S'))
-            self.ax.set_xlabel("时间")
-            
-            # 添加最新价格标注
-            self.ax.annotate(f'¥{prices[-1]:.2f}', 
-                            xy=(times[-1], prices[-1]),
-                            xytext=(10, 10), textcoords='offset points',
-                            bbox=dict(boxstyle='round,pad=0.5', fc='yellow', alpha=0.5),
-                            arrowprops=dict(arrowstyle='->'))
-            
-            self.canvas.draw() 
+        """更新股票图表（增量刷新）"""
+        if len(stock.price_history):
+            times, prices = self._chart_series(stock.price_history, self.chart_range, self.price_chart)
+            self.price_chart.update((stock.code, self.chart_range.get()),
+                                    f"{stock.name} ({stock.code})", times, prices)
 
     def toggle_pause(self, event=None):  # 添加event参数以支持事件绑定
         """切换暂停状态"""
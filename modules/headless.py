@@ -0,0 +1,142 @@
+"""无头模拟入口：不创建任何窗口、音频或网络会话，直接驱动各子系统
+
+用法示例：
+    python -m modules.headless --days 365 --vectorized --summary summary.json --ticks ticks.csv
+    python -m modules.headless --days 3650 --fast --summary summary.json
+    python -m modules.headless --days 365 --fast --correlated
+    python -m modules.headless --days 365 --fast --seed 42
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from modules.simulation import GameSimulation, TICKS_PER_DAY
+
+def run_headless(days, vectorized=False, initial_money=100000, tick_writer=None, tick_every=1, fast=False,
+                 correlated=False, seed=None):
+    """无头运行指定天数，返回统计摘要
+
+    fast 为 True 时按日批量快进（自动启用向量化引擎），不输出逐tick数据；
+    correlated 为 True 时使用行业因子模型；seed 为主随机种子，相同种子的结果完全一致
+    """
+    game = GameSimulation(initial_money=initial_money, vectorized=vectorized or fast, correlated=correlated,
+                          seed=seed)
+    market = game.stock_market
+    start_date = game.game_date
+    index_start = index_min = index_max = market.get_market_index()
+
+    total_ticks = days * TICKS_PER_DAY
+    start = time.perf_counter()
+    if fast:
+        # 按日批量快进，每天结束后统计指数区间
+        for _ in range(days):
+            game.advance(1)
+            index = market.get_market_index()
+            index_min = min(index_min, index)
+            index_max = max(index_max, index)
+    else:
+        for tick in range(1, total_ticks + 1):
+            new_day = game.simulate_tick()
+
+            # 按日统计指数区间，避免每个tick都计算
+            if new_day:
+                index = market.get_market_index()
+                index_min = min(index_min, index)
+                index_max = max(index_max, index)
+
+            if tick_writer and tick % tick_every == 0:
+                tick_writer.writerow([
+                    game.game_date.strftime('%Y-%m-%d'),
+                    tick,
+                    f"{market.get_market_index():.4f}",
+                    f"{market.market_sentiment:.6f}",
+                    f"{game.player.total_assets:.2f}"
+                ])
+    elapsed = time.perf_counter() - start
+
+    # 涨跌幅排行
+    changes = sorted(
+        ((stock.price / stock.initial_price - 1, stock.code, stock.name)
+         for stock in market.get_all_stocks()),
+        reverse=True
+    )
+    index_end = market.get_market_index()
+
+    return {
+        'days': days,
+        'ticks': total_ticks,
+        'vectorized': vectorized or fast or correlated,
+        'fast': fast,
+        'correlated': correlated,
+        'seed': game.streams.seed,
+        'elapsed_seconds': elapsed,
+        'ticks_per_second': total_ticks / elapsed if elapsed > 0 else None,
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': game.game_date.strftime('%Y-%m-%d'),
+        'market': {
+            'stocks': len(market.stocks),
+            'index_start': index_start,
+            'index_end': index_end,
+            'index_min': min(index_min, index_end),
+            'index_max': max(index_max, index_end),
+            'top_gainers': [{'code': c, 'name': n, 'change': r} for r, c, n in changes[:5]],
+            'top_losers': [{'code': c, 'name': n, 'change': r} for r, c, n in changes[-5:]]
+        },
+        'crypto': {symbol: crypto.price for symbol, crypto in game.crypto_market.cryptos.items()},
+        'forex': dict(game.forex_market.rates),
+        'player': {
+            'cash': game.player.cash,
+            'total_assets': game.player.total_assets
+        },
+        'events': {
+            'count': len(game.event_system.event_history),
+            'by_name': dict(Counter(e['name'] for e in game.event_system.event_history)),
+            'unmatched_industries': game.event_system.find_unmatched_industries(market)
+        },
+        'lottery': {
+            'prize_pool': game.lottery.prize_pool
+        }
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="股票交易游戏无头模拟")
+    parser.add_argument('--days', type=int, default=30, help="模拟的游戏天数")
+    parser.add_argument('--vectorized', action='store_true', help="启用向量化行情引擎")
+    parser.add_argument('--fast', action='store_true', help="按日批量快进（不输出逐tick数据）")
+    parser.add_argument('--correlated', action='store_true', help="使用行业因子模型（同行业股票联动）")
+    parser.add_argument('--seed', type=int, help="主随机种子（默认每次随机，摘要中会记录实际种子）")
+    parser.add_argument('--initial-money', type=float, default=100000, help="初始资金")
+    parser.add_argument('--summary', help="统计摘要输出路径（JSON），默认打印到标准输出")
+    parser.add_argument('--ticks', help="逐tick输出路径（CSV）")
+    parser.add_argument('--tick-every', type=int, default=1, help="每隔多少个tick输出一行")
+    args = parser.parse_args(argv)
+    if args.fast and args.ticks:
+        parser.error("--fast 按日批量快进，不输出逐tick数据，不能与 --ticks 同时使用")
+
+    tick_file = None
+    tick_writer = None
+    if args.ticks:
+        tick_file = open(args.ticks, 'w', newline='', encoding='utf-8')
+        tick_writer = csv.writer(tick_file)
+        tick_writer.writerow(['date', 'tick', 'market_index', 'market_sentiment', 'total_assets'])
+
+    try:
+        summary = run_headless(args.days, vectorized=args.vectorized,
+                               initial_money=args.initial_money,
+                               tick_writer=tick_writer, tick_every=max(1, args.tick_every),
+                               fast=args.fast, correlated=args.correlated, seed=args.seed)
+    finally:
+        if tick_file:
+            tick_file.close()
+
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+from datetime import datetime, timedelta
+import numpy as np
+
+EPOCH = datetime(1970, 1, 1)  # 时间戳以本地时间（无时区）相对该时刻的纳秒数表示
+DAY_NS = 86400 * 1000000000  # 一天的纳秒数
+TICKS_PER_DAY = 60           # 每60个tick为一个游戏日（相当于1分钟=1天）
+WEEK_OFFSET = 3 * DAY_NS     # 1970-01-01 是周四，偏移3天使按周分桶从周一开始
+
+# 价格历史的汇总层级（由细到粗）：名称 -> (时间粒度纳秒, 分桶偏移, 保留点数)
+HISTORY_TIERS = {
+    '6h': (DAY_NS // 4, 0, 480),          # 每6小时一个点，约120天
+    'day': (DAY_NS, 0, 730),              # 每天一个点，约2年
+    'week': (7 * DAY_NS, WEEK_OFFSET, 520),  # 每周一个点，约10年
+    'month': (30 * DAY_NS, 0, 600),       # 每30天一个点，约50年
+}
+
+def to_timestamp(dt):
+    """datetime 转换为 int64 纳秒时间戳"""
+    delta = dt - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000000 + delta.microseconds * 1000
+
+def from_timestamp(ts):
+    """int64 纳秒时间戳转换为 datetime"""
+    return EPOCH + timedelta(microseconds=int(ts) // 1000)
+
+class HistoryBlock:
+    """多行共享存储的定长环形价格缓冲区
+
+    每行预分配 2*capacity 个槽位，每次写入同时写到 i 和 i+capacity，
+    因此最近的 count 个点在内存中始终连续，可以零拷贝切片给图表使用
+
+    原始点在即将被覆盖（或查询）时才批量汇总到由细到粗的各层级（RollupTier），
+    因此逐点写入的开销不变，被覆盖的更早走势仍可以从粗粒度层级查询
+    """
+
+    def __init__(self, rows, capacity=100, clock=None, tiers=HISTORY_TIERS, versioned=False):
+        self.rows = rows
+        self.capacity = capacity
+        self.clock = clock  # 返回当前时间戳的函数（例如游戏时间），为 None 时使用系统时间
+        self.prices = np.zeros((rows, 2 * capacity), dtype=np.float64)
+        self.times = np.zeros((rows, 2 * capacity), dtype=np.int64)
+        self.heads = np.zeros(rows, dtype=np.int64)   # 下一个写入位置
+        self.counts = np.zeros(rows, dtype=np.int64)  # 已保存的点数
+        self.synced = np.zeros(rows, dtype=np.int64)  # 上次汇总到各层级时的写入位置
+        # 各行的写入次数（价格版本号），只在需要判断哪些行价格变化时（versioned=True）维护
+        self.versions = np.zeros(rows, dtype=np.int64) if versioned else None
+        self.tiers = {
+            name: RollupTier(rows, period, offset, tier_capacity)
+            for name, (period, offset, tier_capacity) in tiers.items()
+        }
+
+    def row(self, row):
+        """获取某一行的 PriceHistory 视图"""
+        return PriceHistory(block=self, row=row)
+
+    def now(self):
+        """未指定时间戳时写入的当前时间"""
+        if self.clock is not None:
+            return self.clock()
+        return to_timestamp(datetime.now())
+
+    def append(self, row, price, timestamp=None):
+        """向单行追加一个价格点"""
+        if timestamp is None:
+            timestamp = self.now()
+        head = self._append(row, price, timestamp)
+        if self.tiers and (head + 1) % self.capacity == self.synced[row]:
+            # 本行未汇总的点即将占满缓冲区，在被覆盖前只汇总这一行；整列更新走 append_rows 批量汇总
+            self.flush(row)
+
+    def _append(self, row, price, timestamp):
+        head = int(self.heads[row])
+        self.prices[row, head] = self.prices[row, head + self.capacity] = price
+        self.times[row, head] = self.times[row, head + self.capacity] = timestamp
+        head = self.heads[row] = (head + 1) % self.capacity
+        if self.versions is not None:
+            self.versions[row] += 1
+        if self.counts[row] < self.capacity:
+            self.counts[row] += 1
+        return head
+
+    def last_prices(self):
+        """各行最新的价格（每行至少要有一个点）"""
+        return self.prices[np.arange(self.rows), self.heads - 1 + self.capacity]
+
+    def append_rows(self, rows, prices, timestamp=None):
+        """批量追加价格点，rows 为 None 时表示全部行"""
+        if timestamp is None:
+            timestamp = self.now()
+        if rows is None:
+            rows = np.arange(self.rows)
+        self._append_rows(rows, prices, timestamp)
+        if self.tiers:
+            if ((self.heads[rows] + 1) % self.capacity == self.synced[rows]).any():
+                self.flush()
+
+    def _append_rows(self, rows, prices, timestamp):
+        heads = self.heads[rows]
+        self.prices[rows, heads] = self.prices[rows, heads + self.capacity] = prices
+        self.times[rows, heads] = self.times[rows, heads + self.capacity] = timestamp
+        self.heads[rows] = (heads + 1) % self.capacity
+        self.counts[rows] = np.minimum(self.counts[rows] + 1, self.capacity)
+        if self.versions is not None:
+            self.versions[rows] += 1
+
+    def extend(self, row, timestamps, prices):
+        """按时间顺序批量追加单行的多个价格点
+
+        超出容量的部分会被覆盖，因此只写入最后 capacity 个，汇总层级直接处理整段数据
+        """
+        self.extend_rows(timestamps, np.asarray(prices)[:, np.newaxis], np.array([row]))
+
+    def extend_rows(self, timestamps, prices, rows=None):
+        """按时间顺序批量追加多行的多个价格点，prices 形状为 (时刻数, 行数)，rows 为 None 时表示全部行
+
+        超出容量的部分会被覆盖，因此只写入最后 capacity 个时刻，汇总层级直接处理整段数据
+        """
+        if rows is None:
+            rows = np.arange(self.rows)
+        if self.tiers:
+            self.flush(rows)
+        for tier in self.tiers.values():
+            tier.extend_rows(timestamps, prices, rows)
+        self._extend_rows(rows, timestamps, prices)
+        self.synced[rows] = self.heads[rows]
+
+    def _extend_rows(self, rows, timestamps, prices):
+        """向多行一次性写入同一组时刻的多个点，各行的写入位置可以不同"""
+        timestamps, prices = timestamps[-self.capacity:], prices[-self.capacity:]
+        count = len(timestamps)
+        if not count or not len(rows):
+            return
+        heads = self.heads[rows]
+        slots = (heads[:, np.newaxis] + np.arange(count)) % self.capacity
+        index = rows[:, np.newaxis]
+        self.prices[index, slots] = self.prices[index, slots + self.capacity] = prices.T
+        self.times[index, slots] = self.times[index, slots + self.capacity] = timestamps
+        self.heads[rows] = (heads + count) % self.capacity
+        self.counts[rows] = np.minimum(self.counts[rows] + count, self.capacity)
+        if self.versions is not None:
+            self.versions[rows] += 1
+
+    def flush(self, rows=None):
+        """把尚未汇总的原始点写入各层级，rows 可以是单行或多行，为 None 时表示全部行"""
+        rows = np.arange(self.rows) if rows is None else np.atleast_1d(rows)
+        heads = self.heads[rows]
+        pending = (heads - self.synced[rows]) % self.capacity
+        dirty = pending > 0
+        rows, heads, pending = rows[dirty], heads[dirty], pending[dirty]
+        if not len(rows):
+            return
+        # 按 (待汇总点数, 写入位置) 分组，同组且时间轴相同的行（整个市场一起更新）一次性汇总
+        keys = pending * self.capacity + heads
+        for key in (keys[:1] if len(rows) == 1 else np.unique(keys)).tolist():
+            group = rows if len(rows) == 1 else rows[keys == key]
+            count, head = divmod(key, self.capacity)
+            end = (head - 1) % self.capacity + 1 + self.capacity
+            times = self.times[group, end - count:end]
+            if (times == times[0]).all():
+                self._rollup(group, times[0], self.prices[group, end - count:end])
+            else:
+                # 只有部分行额外写入过时时间轴不同，再按时间轴分组
+                _, inverse = np.unique(times, axis=0, return_inverse=True)
+                inverse = inverse.ravel()
+                for i in range(inverse.max() + 1):
+                    part = group[inverse == i]
+                    self._rollup(part, times[inverse == i][0], self.prices[part, end - count:end])
+        self.synced[rows] = heads
+
+    def _rollup(self, rows, times, prices):
+        """把时间轴相同的多行原始点写入各层级，prices 形状为 (行数, 时刻数)"""
+        for tier in self.tiers.values():
+            tier.extend_rows(times, prices.T, rows)
+
+    def window(self, row):
+        """返回某一行最近数据在存储中的切片范围"""
+        count = int(self.counts[row])
+        end = (int(self.heads[row]) - 1) % self.capacity + 1 + self.capacity
+        return slice(end - count, end)
+
+    def load(self, row, times, prices):
+        """用给定序列替换某一行的全部历史（只保留最近 capacity 个点），并重新汇总各层级"""
+        times = np.asarray(times, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        for tier in self.tiers.values():
+            tier.rebuild(row, times, prices)
+        times, prices = times[-self.capacity:], prices[-self.capacity:]
+        count = len(prices)
+        self.prices[row, :count] = self.prices[row, self.capacity:self.capacity + count] = prices
+        self.times[row, :count] = self.times[row, self.capacity:self.capacity + count] = times
+        self.heads[row] = count % self.capacity
+        self.counts[row] = count
+        self.synced[row] = self.heads[row]
+        if self.versions is not None:
+            self.versions[row] += 1
+
+    def levels(self):
+        """原始点和各汇总层级，由细到粗"""
+        return [self] + list(self.tiers.values())
+
+    def query(self, row, start=None, end=None, target_points=500):
+        """查询某一行 [start, end] 时间窗口内的走势
+
+        从细到粗选择第一个完整覆盖窗口且点数不超过 target_points 的层级，
+        都不满足时使用最粗的层级；返回 (时间戳, 价格) 只读零拷贝视图
+        """
+        self.flush(row)
+        for level in self.levels():
+            window = level.window(row)
+            times = level.times[row, window]
+            # 层级未写满时保存了全部历史，写满后最早的点必须不晚于窗口起点
+            covers = level.counts[row] < level.capacity or (start is not None and times[0] <= start)
+            left = 0 if start is None else int(np.searchsorted(times, start, 'left'))
+            right = len(times) if end is None else int(np.searchsorted(times, end, 'right'))
+            if covers and right - left <= target_points:
+                break
+        times = times[left:right]
+        prices = level.prices[row, window][left:right]
+        times.flags.writeable = False
+        prices.flags.writeable = False
+        return times, prices
+
+class RollupTier(HistoryBlock):
+    """价格历史的一个汇总层级：每个时间桶只保留一个点（桶内最新的价格和时间）
+
+    当前桶内的写入覆盖最新的点，进入新桶时才追加，
+    因此任意长的游戏时长只占用固定的 capacity 个点
+    """
+
+    def __init__(self, rows, period, offset=0, capacity=500):
+        super().__init__(rows, capacity, tiers={})
+        self.period = period    # 时间粒度（纳秒）
+        self.offset = offset    # 分桶偏移（纳秒）
+        self.buckets = np.full(rows, -1, dtype=np.int64)  # 各行最新点所在的桶
+
+    def bucket_of(self, timestamps):
+        return (timestamps + self.offset) // self.period
+
+    def _bucket_ends(self, timestamps):
+        """每个桶最后一个点的下标"""
+        buckets = self.bucket_of(timestamps)
+        ends = np.flatnonzero(buckets[1:] != buckets[:-1])
+        return np.append(ends, len(buckets) - 1) if len(buckets) else ends
+
+    def extend_rows(self, timestamps, prices, rows=None):
+        """按时间顺序写入多行的多个价格点，每个桶只保留最后一个点"""
+        if rows is None:
+            rows = np.arange(self.rows)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        ends = self._bucket_ends(timestamps)
+        if not len(ends):
+            return
+        times, prices = timestamps[ends], np.asarray(prices)[ends]
+        buckets = self.bucket_of(times)
+
+        # 第一个桶与某行最新的点同桶时覆盖该点，其余的点追加
+        merge = self.buckets[rows] == buckets[0]
+        if merge.any():
+            merged = rows[merge]
+            slots = (self.heads[merged] - 1) % self.capacity
+            self.prices[merged, slots] = self.prices[merged, slots + self.capacity] = prices[0, merge]
+            self.times[merged, slots] = self.times[merged, slots + self.capacity] = times[0]
+            self._extend_rows(rows[~merge], times[:1], prices[:1, ~merge])
+            self._extend_rows(rows, times[1:], prices[1:])
+        else:
+            self._extend_rows(rows, times, prices)
+        self.buckets[rows] = buckets[-1]
+
+    def load(self, row, times, prices):
+        """用已汇总的序列替换某一行的全部点"""
+        super().load(row, times, prices)
+        count = int(self.counts[row])
+        self.buckets[row] = self.bucket_of(int(self.times[row, count - 1])) if count else -1
+
+    def rebuild(self, row, times, prices):
+        """由原始价格序列重新汇总某一行"""
+        times = np.asarray(times, dtype=np.int64)
+        ends = self._bucket_ends(times)
+        self.load(row, times[ends], np.asarray(prices, dtype=np.float64)[ends])
+
+class PriceHistory:
+    """单个标的的价格历史（HistoryBlock 中一行的视图）"""
+
+    def __init__(self, capacity=100, block=None, row=0, clock=None):
+        self.block = block if block is not None else HistoryBlock(1, capacity, clock)
+        self.row = row
+
+    @property
+    def capacity(self):
+        return self.block.capacity
+
+    def __len__(self):
+        return int(self.block.counts[self.row])
+
+    def __iter__(self):
+        """按时间顺序迭代 (datetime, price)，兼容旧的列表格式"""
+        for ts, price in zip(self.timestamps().tolist(), self.prices().tolist()):
+            yield from_timestamp(ts), price
+
+    def append(self, price, timestamp=None):
+        """追加一个价格点"""
+        self.block.append(self.row, price, timestamp)
+
+    def extend(self, timestamps, prices):
+        """按时间顺序批量追加多个价格点（只写入最后 capacity 个）"""
+        self.block.extend(self.row, timestamps, prices)
+
+    def prices(self):
+        """最近价格的只读零拷贝视图"""
+        view = self.block.prices[self.row, self.block.window(self.row)]
+        view.flags.writeable = False
+        return view
+
+    def timestamps(self):
+        """最近时间戳（int64 纳秒）的只读零拷贝视图"""
+        view = self.block.times[self.row, self.block.window(self.row)]
+        view.flags.writeable = False
+        return view
+
+    def datetimes(self):
+        """最近时间戳的 datetime64 视图，可直接交给 matplotlib"""
+        return self.timestamps().view('datetime64[ns]')
+
+    def last_price(self):
+        """最新价格，没有历史时返回 None"""
+        if not len(self):
+            return None
+        head = int(self.block.heads[self.row])
+        return float(self.block.prices[self.row, head - 1 + self.block.capacity])
+
+    def query(self, start=None, end=None, target_points=500):
+        """查询时间窗口内的走势，自动选择合适粒度的层级
+
+        返回 (datetime64 时间, 价格) 只读视图，start/end 为 int64 纳秒时间戳，None 表示不限
+        """
+        times, prices = self.block.query(self.row, start, end, target_points)
+        return times.view('datetime64[ns]'), prices
+
+    def tier(self, name):
+        """某个汇总层级中本行的 PriceHistory 视图"""
+        self.block.flush(self.row)
+        return PriceHistory(block=self.block.tiers[name], row=self.row)
+
+    def load(self, points):
+        """用 (datetime, price) 序列替换全部历史"""
+        points = list(points)
+        self.block.load(self.row,
+                        [to_timestamp(t) for t, _ in points],
+                        [p for _, p in points])
+
+    def load_arrays(self, timestamps, prices):
+        """用 int64 纳秒时间戳数组和价格数组替换全部历史"""
+        self.block.load(self.row, timestamps, prices)
@@ -1,14 +1,368 @@
-import random
-from datetime import datetime, timedelta
-from collections import defaultdict
+from datetime import datetime
+from collections import defaultdict, deque
+from functools import lru_cache
+from math import comb
+import numpy as np
+from modules.rng import default_rng, python_random
+
+RED_COUNT = 33   # 红球号码范围 1-33
+RED_PICK = 6     # 每注红球个数
+BLUE_COUNT = 16  # 蓝球号码范围 1-16
+TICKET_DAYS = 60  # 彩票有效期（天）
+TICKET_PRICE = 2  # 每注金额（元）
+PRIZE_DAYS = 60   # 奖金领取期限（天）
+CLAIM_SAMPLE_ROWS = 20  # 领奖记录中保留的中奖号码行数（仅用于展示）
+MAX_LEVEL = 6     # 最低奖级
+
+# 红球以 33 位掩码存储：号码 n 对应第 n-1 位
+_RED_BITS = np.left_shift(np.uint64(1), np.arange(RED_COUNT, dtype=np.uint64))
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(values):
+        """逐元素统计二进制中 1 的个数"""
+        return np.bitwise_count(values)
+else:
+    _BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(values):
+        """逐元素统计二进制中 1 的个数（旧版 numpy 按字节查表）"""
+        values = np.ascontiguousarray(values, dtype=np.uint64)
+        return _BYTE_POPCOUNT[values.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.uint8)
+
+def red_mask(red_numbers):
+    """红球号码列表 -> 掩码"""
+    mask = 0
+    for number in red_numbers:
+        mask |= 1 << (number - 1)
+    return mask
+
+def encode_tickets(tickets):
+    """把 [(红球列表, 蓝球)] 编码为 (红球掩码数组, 蓝球数组)，号码不合法的票被丢弃"""
+    if not tickets:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint8)
+    try:
+        reds = np.array([red for red, _ in tickets], dtype=np.int64)
+        blues = np.array([blue for _, blue in tickets], dtype=np.int64)
+    except (TypeError, ValueError):
+        reds = None  # 红球个数不一致
+    if reds is None or reds.ndim != 2 or reds.shape[1] != RED_PICK:
+        # 逐注筛掉个数不对的票后再批量编码
+        return encode_tickets([(red, blue) for red, blue in tickets if len(red) == RED_PICK])
+
+    valid = ((reds >= 1) & (reds <= RED_COUNT)).all(axis=1) & (blues >= 1) & (blues <= BLUE_COUNT)
+    reds, blues = reds[valid], blues[valid]
+    masks = np.bitwise_or.reduce(_RED_BITS[reds - 1], axis=1)
+    unique = popcount(masks) == RED_PICK  # 有重复号码时掩码的位数不足6个
+    return masks[unique], blues[unique].astype(np.uint8)
+
+def blue_mask(blue_numbers):
+    """蓝球号码列表 -> 16 位掩码"""
+    mask = 0
+    for number in blue_numbers:
+        mask |= 1 << (number - 1)
+    return mask
+
+def mask_numbers(mask):
+    """掩码 -> 号码列表（升序）"""
+    return [bit + 1 for bit in range(mask.bit_length()) if mask >> bit & 1]
+
+def validate_bet(red_numbers, blue_numbers):
+    """检查复式（含单式）投注的号码，出错时抛出 ValueError"""
+    if len(set(red_numbers)) != len(red_numbers) or len(set(blue_numbers)) != len(blue_numbers):
+        raise ValueError("号码不能重复")
+    if len(red_numbers) < RED_PICK or not all(1 <= n <= RED_COUNT for n in red_numbers):
+        raise ValueError(f"请选择至少{RED_PICK}个 1-{RED_COUNT} 的红球")
+    if not blue_numbers or not all(1 <= n <= BLUE_COUNT for n in blue_numbers):
+        raise ValueError(f"请选择至少1个 1-{BLUE_COUNT} 的蓝球")
+
+def bet_ticket_count(red_count, blue_count):
+    """复式投注包含的注数：C(红球数, 6) x 蓝球数"""
+    return comb(red_count, RED_PICK) * blue_count
+
+@lru_cache(maxsize=256)
+def bet_outcomes(red_count, blue_count, table):
+    """复式投注在各种命中情况下的各等级中奖注数
+
+    返回形状为 (7, 2, 7) 的数组：[所选红球中命中的开奖红球数, 是否命中蓝球, 等级] -> 注数，
+    等级 0 为未中奖。table 为 Lottery.prize_table() 转成的元组（便于缓存）
+    """
+    outcomes = np.zeros((RED_PICK + 1, 2, MAX_LEVEL + 1), dtype=np.int64)
+    for hits in range(min(red_count, RED_PICK) + 1):
+        for blue_hit in (0, 1):
+            for matched in range(hits + 1):
+                # 从命中的 hits 个红球中选 matched 个，其余从未命中的红球中选
+                combos = comb(hits, matched) * comb(red_count - hits, RED_PICK - matched)
+                outcomes[hits, blue_hit, table[matched][1]] += combos * blue_hit
+                outcomes[hits, blue_hit, table[matched][0]] += combos * (blue_count - blue_hit)
+    return outcomes
+
+def bet_hit_probabilities(red_count, blue_count):
+    """开奖时各命中情况的概率，形状 (7, 2)：[所选红球中命中的开奖红球数, 是否命中蓝球]"""
+    total = comb(RED_COUNT, RED_PICK)
+    red = np.array([comb(red_count, hits) * comb(RED_COUNT - red_count, RED_PICK - hits) / total
+                    for hits in range(RED_PICK + 1)])
+    blue = np.array([1 - blue_count / BLUE_COUNT, blue_count / BLUE_COUNT])
+    return red[:, np.newaxis] * blue[np.newaxis, :]
+
+def random_tickets(rng, count):
+    """机选 count 注，返回 (红球掩码数组, 蓝球数组)"""
+    reds = np.argsort(rng.random((count, RED_COUNT)), axis=1)[:, :RED_PICK]
+    masks = np.bitwise_or.reduce(_RED_BITS[reds], axis=1)
+    blues = rng.integers(1, BLUE_COUNT + 1, count).astype(np.uint8)
+    return masks, blues
+
+class TicketPartition:
+    """同一购买日的全部彩票：红球掩码列和蓝球列，容量按需翻倍"""
+
+    def __init__(self, day, capacity=1024):
+        self.day = day  # 购买日序号（date.toordinal()）
+        self.masks = np.empty(capacity, dtype=np.uint64)
+        self.blues = np.empty(capacity, dtype=np.uint8)
+        self.size = 0
+        self.compounds = []  # 复式投注：[(红球掩码, 蓝球掩码)]，每笔只占一条记录
+
+    def append(self, masks, blues):
+        """追加一批彩票"""
+        end = self.size + len(masks)
+        if end > len(self.masks):
+            capacity = max(end, 2 * len(self.masks))
+            self.masks = np.resize(self.masks, capacity)
+            self.blues = np.resize(self.blues, capacity)
+        self.masks[self.size:end] = masks
+        self.blues[self.size:end] = blues
+        self.size = end
+
+    def trim(self):
+        """释放多余的容量（该日不再有新票时调用）"""
+        if self.size < len(self.masks):
+            self.masks = self.masks[:self.size].copy()
+            self.blues = self.blues[:self.size].copy()
+
+class TicketStore:
+    """按购买日分区的列式彩票存储：每注只占 9 字节（uint64 掩码 + uint8 蓝球），
+    复式投注不展开，每笔只存一条 (红球掩码, 蓝球掩码) 记录
+
+    分区按日期先后放在 deque 中，过期时整块从左端弹出，
+    不需要逐个检查日期；购买日列由分区的日期展开，不逐注存储
+    """
 
-class Lottery:
     def __init__(self):
-        self.tickets = defaultdict(list)  # {date: [(red_numbers, blue_number)]}
+        self.partitions = deque()
+        self.count = 0           # 单式票注数
+        self.compound_count = 0  # 复式投注笔数
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        """各列实际占用的内存（字节）"""
+        return sum(p.masks.nbytes + p.blues.nbytes for p in self.partitions)
+
+    def add(self, day, masks, blues):
+        """添加 day 这一天购买的彩票"""
+        if not len(masks):
+            return
+        self._partition(day).append(masks, blues)
+        self.count += len(masks)
+
+    def add_compound(self, day, red_mask_value, blue_mask_value):
+        """添加 day 这一天购买的一笔复式投注"""
+        self._partition(day).compounds.append((red_mask_value, blue_mask_value))
+        self.compound_count += 1
+
+    def _partition(self, day):
+        """day 对应的分区，不存在时按日期顺序新建"""
+        partitions = self.partitions
+        if partitions and partitions[-1].day == day:
+            return partitions[-1]
+        if not partitions or partitions[-1].day < day:
+            if partitions:
+                partitions[-1].trim()  # 新的一天开始，前一天的分区不会再增长
+            partitions.append(TicketPartition(day))
+            return partitions[-1]
+        # 日期早于最新分区（例如读档后时间倒退），找到或插入对应位置的分区
+        index = next(i for i, p in enumerate(partitions) if p.day >= day)
+        if partitions[index].day != day:
+            partitions.insert(index, TicketPartition(day))
+        return partitions[index]
+
+    def expire(self, before_day):
+        """丢弃 before_day 之前购买的全部分区，返回丢弃的注数"""
+        dropped = 0
+        partitions = self.partitions
+        while partitions and partitions[0].day < before_day:
+            partition = partitions.popleft()
+            dropped += partition.size
+            self.compound_count -= len(partition.compounds)
+        self.count -= dropped
+        return dropped
+
+    def _select(self, start_day, end_day):
+        """购买日在 [start_day, end_day) 内的分区"""
+        return [p for p in self.partitions
+                if (start_day is None or p.day >= start_day) and (end_day is None or p.day < end_day)]
+
+    def columns(self, start_day=None, end_day=None):
+        """购买日在 [start_day, end_day) 内的单式票，返回 (红球掩码, 蓝球, 购买日) 三列"""
+        selected = [p for p in self._select(start_day, end_day) if p.size]
+        if not selected:
+            return (np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint8), np.empty(0, dtype=np.int32))
+        masks = np.concatenate([p.masks[:p.size] for p in selected])
+        blues = np.concatenate([p.blues[:p.size] for p in selected])
+        days = np.repeat(np.array([p.day for p in selected], dtype=np.int32), [p.size for p in selected])
+        return masks, blues, days
+
+    def compound_bets(self, start_day=None, end_day=None):
+        """购买日在 [start_day, end_day) 内的复式投注 [(红球掩码, 蓝球掩码)]"""
+        return [bet for p in self._select(start_day, end_day) for bet in p.compounds]
+
+    def clear(self):
+        """清空全部彩票"""
+        self.partitions.clear()
+        self.count = 0
+        self.compound_count = 0
+
+class PrizeLedger:
+    """未领取奖项台账：按到期日分桶放在 deque 中
+
+    开奖按日期先后进行，新奖项的到期日不早于已有的桶，追加到右端即可；
+    每天只需从左端弹出已到期的桶，代价与到期的奖项数成正比
+    """
+
+    def __init__(self):
+        self.buckets = deque()  # [[到期日序号, [奖项, ...]], ...]，按到期日升序
+        self.count = 0
+        self.total = 0          # 未领取奖金总额
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for _, prizes in self.buckets:
+            yield from prizes
+
+    def add(self, prize, expiry_day):
+        """登记一条奖项，expiry_day 为最后可领取日的序号"""
+        buckets = self.buckets
+        if buckets and buckets[-1][0] == expiry_day:
+            buckets[-1][1].append(prize)
+        elif not buckets or buckets[-1][0] < expiry_day:
+            buckets.append([expiry_day, [prize]])
+        else:
+            # 到期日早于最新的桶（例如读档后时间倒退），找到或插入对应位置的桶
+            index = next(i for i, (day, _) in enumerate(buckets) if day >= expiry_day)
+            if buckets[index][0] == expiry_day:
+                buckets[index][1].append(prize)
+            else:
+                buckets.insert(index, [expiry_day, [prize]])
+        self.count += 1
+        self.total += prize["amount"]
+
+    def expire(self, today):
+        """弹出最后可领取日早于 today 的全部奖项"""
+        expired = []
+        buckets = self.buckets
+        while buckets and buckets[0][0] < today:
+            expired.extend(buckets.popleft()[1])
+        self.count -= len(expired)
+        self.total -= sum(prize["amount"] for prize in expired)
+        return expired
+
+    def pop_all(self):
+        """取出全部奖项（领奖）"""
+        prizes = list(self)
+        self.clear()
+        return prizes
+
+    def clear(self):
+        """清空台账"""
+        self.buckets.clear()
+        self.count = 0
+        self.total = 0
+
+class ClaimLog:
+    """已领取奖项的只追加列式日志：每条记录一行，中奖号码另存为三列并用 offsets 划分
+
+    历史窗口按页读取，只展开当前页的记录
+    """
+
+    FIELDS = {'day': np.int32, 'level': np.uint8, 'count': np.int64,
+              'amount': np.float64, 'offset': np.int64}
+    TICKET_FIELDS = {'red_masks': np.uint64, 'blue_masks': np.uint16, 'ticket_counts': np.int64}
+
+    def __init__(self, capacity=64):
+        self.columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.FIELDS.items()}
+        self.tickets = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.TICKET_FIELDS.items()}
+        self.size = 0
+        self.ticket_size = 0
+        self.total_amount = 0
+
+    def __len__(self):
+        return self.size
+
+    @staticmethod
+    def _reserve(columns, needed):
+        """容量不足时把各列翻倍扩容"""
+        capacity = len(next(iter(columns.values())))
+        if needed > capacity:
+            capacity = max(needed, 2 * capacity)
+            for name, column in columns.items():
+                columns[name] = np.resize(column, capacity)
+
+    def append(self, prize):
+        """追加一条奖项记录（中奖号码只保留前 CLAIM_SAMPLE_ROWS 行）"""
+        rows = min(len(prize["red_masks"]), CLAIM_SAMPLE_ROWS)
+        self._reserve(self.columns, self.size + 1)
+        self._reserve(self.tickets, self.ticket_size + rows)
+        i = self.size
+        self.columns['day'][i] = prize["date"].toordinal()
+        self.columns['level'][i] = prize["level"]
+        self.columns['count'][i] = prize["count"]
+        self.columns['amount'][i] = prize["amount"]
+        self.columns['offset'][i] = self.ticket_size
+        end = self.ticket_size + rows
+        for name in self.TICKET_FIELDS:
+            self.tickets[name][self.ticket_size:end] = prize[name][:rows]
+        self.size += 1
+        self.ticket_size = end
+        self.total_amount += prize["amount"]
+
+    def record(self, index):
+        """展开第 index 条记录：{date, level, count, amount, numbers: [(红球, 蓝球, 注数)]}"""
+        columns = self.columns
+        start = int(columns['offset'][index])
+        end = int(columns['offset'][index + 1]) if index + 1 < self.size else self.ticket_size
+        numbers = [(mask_numbers(r), mask_numbers(b), c) for r, b, c in zip(
+            self.tickets['red_masks'][start:end].tolist(),
+            self.tickets['blue_masks'][start:end].tolist(),
+            self.tickets['ticket_counts'][start:end].tolist())]
+        return {
+            'date': datetime.fromordinal(int(columns['day'][index])),
+            'level': int(columns['level'][index]),
+            'count': int(columns['count'][index]),
+            'amount': float(columns['amount'][index]),
+            'numbers': numbers,
+        }
+
+    def page(self, page, page_size=20):
+        """第 page 页（从 0 开始，最新的记录在前）的记录列表"""
+        start = self.size - page * page_size
+        return [self.record(i) for i in range(start - 1, max(start - page_size, 0) - 1, -1)]
+
+    def page_count(self, page_size=20):
+        """总页数"""
+        return max(1, -(-self.size // page_size))
+
+class Lottery:
+    def __init__(self, rng=None):
+        self.rng = default_rng(rng)
+        self.random = python_random(self.rng)  # 开奖摇号用
+        self.tickets = TicketStore()  # 按购买日分区的列式彩票存储
         self.prize_pool = 1000000  # 初始奖池100万
         self.last_draw_date = None
-        self.unclaimed_prizes = []  # 未领取的奖金
-        self.claimed_prizes = []    # 已领取的奖金
+        self.unclaimed_prizes = PrizeLedger()  # 未领取的奖金，按到期日分桶
+        self.claimed_prizes = ClaimLog()       # 已领取的奖金（只追加的列式日志）
         
         # 奖金设置
         self.prize_settings = {
@@ -22,15 +376,89 @@ class Lottery:
     
     def add_tickets(self, date, tickets):
         """添加彩票"""
-        # 验证号码格式
-        for red_numbers, blue_number in tickets:
-            if not self._validate_numbers(red_numbers, blue_number):
-                continue
-            self.tickets[date].append((sorted(red_numbers), blue_number))
+        # 验证号码格式并编码，不合法的票被丢弃
+        masks, blues = encode_tickets(tickets)
+        if len(masks):
+            self.tickets.add(date.toordinal(), masks, blues)
         
         # 增加奖池
         self.prize_pool += len(tickets) * 2  # 每注2元
     
+    def add_ticket_masks(self, date, masks, blues):
+        """添加已编码的彩票（红球掩码数组、蓝球数组），用于批量机选"""
+        masks = np.asarray(masks, dtype=np.uint64)
+        if len(masks):
+            self.tickets.add(date.toordinal(), masks, np.asarray(blues, dtype=np.uint8))
+        self.prize_pool += len(masks) * 2  # 每注2元
+    
+    def add_compound_bet(self, date, red_numbers, blue_numbers):
+        """添加一笔复式投注（不展开为单注），返回包含的注数"""
+        validate_bet(red_numbers, blue_numbers)
+        self.tickets.add_compound(date.toordinal(), red_mask(red_numbers), blue_mask(blue_numbers))
+        count = bet_ticket_count(len(red_numbers), len(blue_numbers))
+        self.prize_pool += count * TICKET_PRICE
+        return count
+    
+    def prize_amounts(self):
+        """按当前奖池估算的各等级单注奖金 {等级: 金额}（一、二等奖按独得计算）"""
+        return {level: self._calculate_prize_amount(level, 1) for level in self.prize_settings}
+    
+    def analyze_bet(self, red_numbers, blue_numbers, prize_amounts=None):
+        """不展开投注，按组合数精确计算注数、金额、各等级中奖概率和期望值
+
+        tier_probabilities 为至少中一注该等级的概率，expected_winners 为该等级的期望中奖注数；
+        prize_amounts 默认按当前奖池估算
+        """
+        validate_bet(red_numbers, blue_numbers)
+        red_count, blue_count = len(red_numbers), len(blue_numbers)
+        tickets = bet_ticket_count(red_count, blue_count)
+        amounts = prize_amounts or self.prize_amounts()
+        outcomes = bet_outcomes(red_count, blue_count, self._table_key())
+        probabilities = bet_hit_probabilities(red_count, blue_count)
+        
+        levels = range(1, MAX_LEVEL + 1)
+        hit = probabilities[:, :, np.newaxis] * (outcomes > 0)
+        expected = (probabilities[:, :, np.newaxis] * outcomes).sum(axis=(0, 1))
+        prize = outcomes[:, :, 1:] @ np.array([amounts[level] for level in levels], dtype=np.float64)
+        expected_return = float((probabilities * prize).sum())
+        return {
+            'tickets': tickets,
+            'cost': tickets * TICKET_PRICE,
+            'tier_probabilities': {level: float(hit[:, :, level].sum()) for level in levels},
+            'expected_winners': {level: float(expected[level]) for level in levels},
+            'win_probability': float(probabilities[prize > 0].sum()),
+            'expected_return': expected_return,
+            'expected_value': expected_return - tickets * TICKET_PRICE,
+        }
+    
+    def simulate_bet(self, red_numbers, blue_numbers, draws=100000, prize_amounts=None, rng=None):
+        """蒙特卡洛模拟 draws 次开奖，返回该投注的返奖统计（用于核对 analyze_bet 或估算方差）
+
+        rng 默认新建，不占用开奖所用的随机数流
+        """
+        validate_bet(red_numbers, blue_numbers)
+        red_count, blue_count = len(red_numbers), len(blue_numbers)
+        tickets = bet_ticket_count(red_count, blue_count)
+        amounts = prize_amounts or self.prize_amounts()
+        outcomes = bet_outcomes(red_count, blue_count, self._table_key())
+        
+        # 批量生成开奖号码，每次开奖只需统计命中数，再查各命中情况的返奖
+        winning_masks, winning_blues = random_tickets(default_rng(rng), draws)
+        hits = popcount(winning_masks & np.uint64(red_mask(red_numbers))).astype(np.intp)
+        blue_hits = np.isin(winning_blues, blue_numbers).astype(np.intp)
+        counts = outcomes[hits, blue_hits]
+        prize = counts[:, 1:] @ np.array([amounts[level] for level in range(1, MAX_LEVEL + 1)], dtype=np.float64)
+        return {
+            'draws': draws,
+            'tickets': tickets,
+            'cost': tickets * TICKET_PRICE,
+            'tier_frequencies': {level: float((counts[:, level] > 0).mean()) for level in range(1, MAX_LEVEL + 1)},
+            'win_frequency': float((prize > 0).mean()),
+            'mean_return': float(prize.mean()),
+            'std_return': float(prize.std()),
+            'mean_value': float(prize.mean()) - tickets * TICKET_PRICE,
+        }
+    
     def draw_lottery(self, current_date):
         """开奖"""
         # 检查是否是开奖日（每周二、四、日）
@@ -44,64 +472,108 @@ class Lottery:
         self.last_draw_date = current_date
         
         # 生成开奖号码
-        winning_red = sorted(random.sample(range(1, 34), 6))
-        winning_blue = random.randint(1, 16)
+        winning_red = sorted(self.random.sample(range(1, 34), 6))
+        winning_blue = self.random.randint(1, 16)
         
-        # 检查中奖
+        # 第一阶段：统计各等级的最终中奖注数
+        # 检查60天内的票：整块丢弃过期分区，跳过今天及以后购买的票
+        today = current_date.toordinal()
+        self.tickets.expire(today - TICKET_DAYS)
+        masks, blues, _ = self.tickets.columns(end_day=today)
+        
+        # 单式票一次性判奖：红球命中数 = popcount(掩码 & 开奖掩码)，再查中奖等级表
+        levels = self.score_tickets(masks, blues, winning_red, winning_blue)
+        counts = np.bincount(levels, minlength=MAX_LEVEL + 1).astype(np.int64)
+        
+        # 复式投注按组合数直接算出各等级的中奖注数
+        winning_mask = red_mask(winning_red)
+        table = self._table_key()
+        compounds = []  # [(红球掩码, 蓝球掩码, 各等级注数)]
+        for red_mask_value, blue_mask_value in self.tickets.compound_bets(end_day=today):
+            bet_counts = bet_outcomes(bin(red_mask_value).count('1'), bin(blue_mask_value).count('1'), table)[
+                bin(red_mask_value & winning_mask).count('1'), blue_mask_value >> (winning_blue - 1) & 1]
+            counts += bet_counts
+            compounds.append((red_mask_value, blue_mask_value, bet_counts))
+        
+        # 第二阶段：按最终注数计算各等级单注奖金，从奖池扣除，每个等级批量写入一条未领取记录
         winners = defaultdict(int)  # {prize_level: count}
-        total_prize = 0
-        
-        # 检查60天内的票
-        check_date = current_date - timedelta(days=60)
-        for date, date_tickets in list(self.tickets.items()):
-            if date < check_date:
-                del self.tickets[date]  # 清理过期票
-                continue
-            
-            if date >= current_date:
-                continue  # 跳过未来的票
+        units = {level: self._calculate_prize_amount(level, int(counts[level]))
+                 for level in range(1, MAX_LEVEL + 1) if counts[level]}
+        total_prize = sum(units[level] * int(counts[level]) for level in units)
+        if total_prize > self.prize_pool:
+            # 奖池不足以支付全部奖金时按比例缩减
+            scale = max(self.prize_pool, 0) / total_prize
+            units = {level: unit * scale for level, unit in units.items()}
+            total_prize = sum(units[level] * int(counts[level]) for level in units)
+        self.prize_pool -= total_prize
+        
+        for level, unit in units.items():
+            count = int(counts[level])
+            winners[level] = count
             
-            for red_numbers, blue_number in date_tickets:
-                prize_level = self._check_prize(
-                    red_numbers, blue_number, 
-                    winning_red, winning_blue
-                )
-                if prize_level:
-                    winners[prize_level] += 1
-                    
-                    # 记录未领取奖项
-                    self.unclaimed_prizes.append({
-                        "date": current_date,
-                        "level": prize_level,
-                        "amount": self._calculate_prize_amount(prize_level, winners[prize_level]),
-                        "numbers": (red_numbers, blue_number),
-                        "winning_numbers": (winning_red, winning_blue)
-                    })
+            # 中奖票按 (红球掩码, 蓝球掩码, 注数) 列存储：单式票各占一行，复式投注一笔一行
+            single = levels == level
+            bets = [(r, b, int(c[level])) for r, b, c in compounds if c[level]]
+            self.unclaimed_prizes.add({
+                "date": current_date,
+                "level": level,
+                "count": count,
+                "unit_amount": unit,
+                "amount": unit * count,
+                "red_masks": np.concatenate([masks[single], np.array([r for r, _, _ in bets], dtype=np.uint64)]),
+                "blue_masks": np.concatenate([np.left_shift(np.uint16(1), blues[single].astype(np.uint16) - 1),
+                                              np.array([b for _, b, _ in bets], dtype=np.uint16)]),
+                "ticket_counts": np.concatenate([np.ones(np.count_nonzero(single), dtype=np.int64),
+                                                 np.array([c for _, _, c in bets], dtype=np.int64)]),
+                "winning_numbers": (winning_red, winning_blue)
+            }, today + PRIZE_DAYS)
         
         return winning_red, winning_blue, winners
     
+    def prize_numbers(self, prize, limit=None):
+        """展开奖项记录中的中奖号码：[(红球列表, 蓝球列表, 注数)]，limit 限制返回的行数"""
+        rows = len(prize["red_masks"]) if limit is None else min(limit, len(prize["red_masks"]))
+        reds = prize["red_masks"][:rows].tolist()
+        blues = prize["blue_masks"][:rows].tolist()
+        counts = prize["ticket_counts"][:rows].tolist()
+        return [(mask_numbers(r), mask_numbers(b), c) for r, b, c in zip(reds, blues, counts)]
+    
+    def prize_table(self):
+        """中奖等级表：table[红球命中数, 是否命中蓝球] -> 等级（0 表示未中奖），与 _check_prize 规则一致"""
+        table = np.zeros((RED_PICK + 1, 2), dtype=np.uint8)
+        for red_matches in range(RED_PICK + 1):
+            for blue_match in (False, True):
+                table[red_matches, int(blue_match)] = self._match_level(red_matches, blue_match) or 0
+        return table
+    
+    def _table_key(self):
+        """中奖等级表的元组形式，作为 bet_outcomes 的缓存键"""
+        return tuple(map(tuple, self.prize_table().tolist()))
+    
+    def score_tickets(self, masks, blues, winning_red, winning_blue):
+        """批量判奖，返回每注的中奖等级数组（0 表示未中奖）"""
+        red_matches = popcount(np.asarray(masks, dtype=np.uint64) & np.uint64(red_mask(winning_red)))
+        blue_matches = (np.asarray(blues) == winning_blue).astype(np.intp)
+        return self.prize_table()[red_matches, blue_matches]
+    
     def claim_prizes(self, current_date):
-        """领取奖金"""
-        total_claimed = 0
-        expired_prizes = []
-        remaining_prizes = []
-        
-        for prize in self.unclaimed_prizes:
-            days_passed = (current_date - prize["date"]).days
-            if days_passed <= 60:  # 60天内可以领奖
-                total_claimed += prize["amount"]
-                self.claimed_prizes.append(prize)
-            else:
-                expired_prizes.append(prize)
-                # 过期奖金返回奖池
-                self.prize_pool += prize["amount"]
+        """领取奖金：先处理过期奖项，再领取其余全部奖项，返回 (领取金额, 过期奖项)"""
+        expired_prizes = self.expire_prizes(current_date)
         
-        # 更新未领取奖金列表
-        self.unclaimed_prizes = [p for p in self.unclaimed_prizes 
-                               if (current_date - p["date"]).days <= 60]
+        total_claimed = 0
+        for prize in self.unclaimed_prizes.pop_all():
+            total_claimed += prize["amount"]
+            self.claimed_prizes.append(prize)
         
         return total_claimed, expired_prizes
     
+    def expire_prizes(self, current_date):
+        """处理超过60天未领取的奖项，奖金返回奖池，返回过期奖项（每日结算调用）"""
+        expired_prizes = self.unclaimed_prizes.expire(current_date.toordinal())
+        for prize in expired_prizes:
+            self.prize_pool += prize["amount"]
+        return expired_prizes
+    
     def _validate_numbers(self, red_numbers, blue_number):
         """验证号码是否合法"""
         # 检查红球
@@ -122,7 +594,10 @@ class Lottery:
         """检查中奖等级"""
         red_matches = len(set(red_numbers) & set(winning_red))
         blue_match = blue_number == winning_blue
-        
+        return self._match_level(red_matches, blue_match)
+    
+    def _match_level(self, red_matches, blue_match):
+        """按红球命中数和蓝球是否命中确定中奖等级"""
         for level, settings in self.prize_settings.items():
             required_red, required_blue = settings["match"]
             if required_red == 0:  # 六等奖特殊处理
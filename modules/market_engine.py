@@ -0,0 +1,174 @@
+import numpy as np
+
+# 引擎按列存储的股票字段（与 Stock 的同名属性一一对应）
+ENGINE_FIELDS = (
+    'price', 'initial_price',
+    'volatility', 'trend', 'beta', 'resistance',
+    'pe_ratio', 'pb_ratio', 'market_cap', 'float_shares',
+    'dividend_yield', 'turnover_rate',
+    'revenue_growth', 'profit_margin', 'debt_ratio', 'roe'
+)
+
+# 因子模型中各部分占收益噪声方差的比例
+MARKET_SHARE = 0.2      # 市场因子（按 beta² 放大）
+INDUSTRY_SHARE = 0.3    # 行业因子
+MIN_IDIO_SHARE = 0.1    # 个股特质项至少保留的比例
+
+def sentiment_path(start, shocks, decay=0.95):
+    """按 s = s * decay + shock 递推整段情绪序列"""
+    path = np.empty(len(shocks))
+    sentiment = start
+    for i, shock in enumerate(shocks.tolist()):
+        sentiment = sentiment * decay + shock
+        path[i] = sentiment
+    return path
+
+class FactorModel:
+    """行业因子模型：收益噪声 = 市场因子 + 所属行业因子 + 个股特质项
+
+    行业载荷是 one-hot 矩阵，这里只保存每只股票的行业编码，
+    每个 tick 生成 1 个市场因子、每个行业 1 个因子和每只股票 1 个特质项，
+    按编码取出行业因子即可，计算量为 O(股票数)，不需要 N×N 的协方差矩阵
+    """
+
+    def __init__(self, industries, market_share=MARKET_SHARE, industry_share=INDUSTRY_SHARE):
+        names, codes = np.unique(np.asarray(list(industries), dtype=str), return_inverse=True)
+        self.industries = names.tolist()   # 行业名称，下标即行业编码
+        self.codes = codes.ravel()         # 每只股票的行业编码
+        self.size = len(self.codes)
+        self.market_share = market_share
+        self.industry_share = industry_share
+        self._beta = None
+        self._loadings = None
+
+    def loadings(self, beta):
+        """(市场载荷, 行业载荷, 特质载荷)，三者平方和为 1，beta 不变时复用缓存"""
+        if self._beta is None or not np.array_equal(self._beta, beta):
+            market = np.sqrt(np.clip(self.market_share * beta ** 2, 0,
+                                     1 - self.industry_share - MIN_IDIO_SHARE))
+            industry = np.sqrt(self.industry_share)
+            idio = np.sqrt(1 - market ** 2 - self.industry_share)
+            self._beta = beta.copy()
+            self._loadings = (market, industry, idio)
+        return self._loadings
+
+    def noise(self, rng, ticks, beta):
+        """生成 (tick数, 股票数) 的相关噪声，每只股票的边际分布仍为标准正态"""
+        market_load, industry_load, idio_load = self.loadings(beta)
+        market = rng.standard_normal((ticks, 1))
+        industry = rng.standard_normal((ticks, len(self.industries)))
+        noise = rng.standard_normal((ticks, self.size))
+        noise *= idio_load
+        noise += market * market_load
+        noise += industry[:, self.codes] * industry_load
+        return noise
+
+    def correlation(self, beta):
+        """模型隐含的收益相关系数矩阵（用于检查，规模较大时不要调用）"""
+        market_load, industry_load, _ = self.loadings(beta)
+        same_industry = self.codes[:, np.newaxis] == self.codes[np.newaxis, :]
+        corr = np.outer(market_load, market_load) + np.where(same_industry, industry_load ** 2, 0)
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+class MarketEngine:
+    """向量化行情引擎：以列存储全部股票参数，一次批量推进整个市场
+
+    correlated 为 True 时基础波动改由 FactorModel 生成，同行业的股票同涨同跌，
+    每只股票的波动分布不变
+    """
+
+    def __init__(self, stocks, rng=None, correlated=False):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.stocks = list(stocks)
+        self.size = len(self.stocks)
+        # 因子载荷只依赖股票集合（行业编码），引擎创建时构建一次
+        self.factors = FactorModel(stock.industry for stock in self.stocks) if correlated else None
+
+        # 从股票对象复制各字段为 float64 列
+        for field in ENGINE_FIELDS:
+            column = np.array([getattr(stock, field) for stock in self.stocks], dtype=np.float64)
+            setattr(self, field, column)
+
+        # 绑定后股票对象的字段读写将直接作用于引擎中的列
+        for row, stock in enumerate(self.stocks):
+            stock.bind_engine(self, row)
+
+    def unbind(self):
+        """解除所有股票与引擎的绑定，字段值复制回股票对象"""
+        for stock in self.stocks:
+            stock.unbind_engine()
+
+    def step(self, market_sentiment=0):
+        """批量更新所有股票价格（与 Stock.update_price 的模型同分布）"""
+        prices, _ = self.advance(np.array([market_sentiment], dtype=np.float64))
+        return prices[-1]
+
+    def advance(self, sentiments):
+        """连续推进多个 tick，sentiments 为每个 tick 的市场情绪
+
+        返回 (价格路径, 换手率路径)，形状均为 (tick数, 股票数)
+
+        与价格路径无关的随机项和因子一次性为整段时间生成，
+        逐 tick 循环中只计算依赖上一价格的市值、回归和涨跌幅限制
+        """
+        sentiments = np.asarray(sentiments, dtype=np.float64)
+        ticks, n = len(sentiments), self.size
+        rng = self.rng
+
+        # 基础波动
+        if self.factors is None:
+            change = rng.normal(self.trend, self.volatility, (ticks, n))
+        else:
+            change = self.trend + self.volatility * self.factors.noise(rng, ticks, self.beta)
+
+        # 考虑估值影响：高估值更容易下跌，低估值有上涨动力
+        valuation = rng.uniform(0, 1, (ticks, n))
+        change -= np.where(self.pe_ratio > 30, valuation * 0.001, 0)
+        change += np.where(self.pe_ratio < 15, valuation * 0.0005, 0)
+
+        # 考虑换手率影响：使用上一个 tick 结束时的换手率
+        turnover = rng.uniform(0.5, 5, (ticks, n))
+        previous_turnover = np.vstack([self.turnover_rate[np.newaxis, :], turnover[:-1]])
+        change *= np.where(previous_turnover > 3, 1.1, 1.0)
+
+        # 考虑财务指标影响
+        good = (self.revenue_growth > 0.2) & (self.profit_margin > 0.15)
+        bad = ~good & ((self.revenue_growth < 0) | (self.profit_margin < 0.05))
+        financial = rng.uniform(0, 0.0005, (ticks, n))
+        offset = np.where(good, financial, np.where(bad, -financial, 0))
+
+        # 市场情绪影响
+        market_impact = sentiments[:, np.newaxis] * self.beta
+        market_impact = np.where(sentiments[:, np.newaxis] < 0,
+                                 market_impact * (2 - self.resistance), market_impact)
+        offset += market_impact
+
+        path = np.empty((ticks, n))
+        price = self.price.copy()
+        market_cap = self.market_cap
+        floor = self.initial_price * 0.2
+        for t in range(ticks):
+            # 考虑市值影响：大市值波动小，小市值波动大
+            tick_change = change[t] * np.where(market_cap > 1e10, 0.9,
+                                               np.where(market_cap < 1e9, 1.1, 1.0))
+            tick_change += offset[t]
+
+            # 价格回归机制：偏离初始价格超过50%时添加小幅回归力
+            price_diff_ratio = (price - self.initial_price) / self.initial_price
+            tick_change += np.where(np.abs(price_diff_ratio) > 0.5, -price_diff_ratio * 0.001, 0)
+
+            # 更新价格，并限制单次波动幅度（±10%），且不低于初始价格的20%
+            new_price = price * (1 + tick_change)
+            np.clip(new_price, price * 0.9, price * 1.1, out=new_price)
+            np.maximum(new_price, floor, out=new_price)
+
+            path[t] = price = new_price
+            market_cap = new_price * self.float_shares
+
+        # 原地写回，保持股票对象与列的绑定
+        self.price[:] = price
+        self.market_cap[:] = market_cap
+        self.turnover_rate[:] = turnover[-1]
+
+        return path, turnover
@@ -0,0 +1,210 @@
+"""蒙特卡洛批量模拟：在进程池中并行运行大量独立的无头游戏，汇总结果分布
+
+每局游戏使用由主种子派生的不同种子，同一主种子的整批结果可以完整复现。
+策略是每个游戏日结束时调用一次的函数 strategy(game)，需定义在模块顶层以便传入子进程。
+
+用法示例：
+    python -m modules.monte_carlo --runs 1000 --days 365 --strategy buy_and_hold
+    python -m modules.monte_carlo --runs 200 --days 90 --strategy random_trader --seed 42 --workers 8 --out mc.json
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from modules.simulation import GameSimulation
+
+LOT_SIZE = 100  # 每手股数
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# ---- 内置策略：参数为 GameSimulation，在每个游戏日结束时调用 ----
+
+def hold_cash(game):
+    """持有现金，不做任何交易（基准）"""
+
+def buy_and_hold(game, count=10):
+    """第一天随机选 count 只股票等额买入，之后一直持有"""
+    player = game.player
+    if player.stocks:
+        return
+    stocks = game.random.sample(game.stock_market.get_all_stocks(), count)
+    budget = player.cash / count
+    for stock in stocks:
+        quantity = int(budget / stock.price / LOT_SIZE) * LOT_SIZE
+        if quantity:
+            player.buy_stock(stock.code, quantity, stock.price)
+
+def random_trader(game):
+    """每天随机买入或卖出一手随机选择的股票"""
+    player = game.player
+    market = game.stock_market
+    held = [code for code, quantity in player.stocks.items() if quantity > 0]
+    if held and game.random.random() < 0.5:
+        code = game.random.choice(held)
+        player.sell_stock(code, min(LOT_SIZE, player.stocks[code]), market.get_stock(code).price)
+    else:
+        stock = game.random.choice(market.get_all_stocks())
+        player.buy_stock(stock.code, LOT_SIZE, stock.price)
+
+# 策略名称 -> 策略函数
+STRATEGIES = {
+    'hold_cash': hold_cash,
+    'buy_and_hold': buy_and_hold,
+    'random_trader': random_trader,
+}
+
+def max_drawdown(values):
+    """序列的最大回撤（相对前高的最大跌幅，0~1）"""
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return 0.0
+    peaks = np.maximum.accumulate(values)
+    return float(np.max(1 - values / np.where(peaks > 0, peaks, 1)))
+
+def run_game(task):
+    """运行一局无头游戏并返回结果（在子进程中执行，参数和返回值均需可序列化）"""
+    strategy = task['strategy']
+    if isinstance(strategy, str):
+        strategy = STRATEGIES[strategy]
+    game = GameSimulation(initial_money=task['initial_money'], vectorized=task['fast'],
+                          correlated=task['correlated'], seed=task['seed'])
+    if task['configure']:
+        task['configure'](game)  # 调整事件概率、股票参数等平衡性设置
+    player = game.player
+    market = game.stock_market
+
+    assets = np.empty(task['days'] + 1)
+    assets[0] = player.calculate_total_assets(market)
+    for day in range(1, task['days'] + 1):
+        if task['fast']:
+            game.advance(1)
+        else:
+            game.simulate_days(1)
+        strategy(game)
+        assets[day] = player.calculate_total_assets(market)
+
+    return {
+        'seed': task['seed'],
+        'final_assets': float(assets[-1]),
+        'return': float(assets[-1] / assets[0] - 1),
+        'max_drawdown': max_drawdown(assets),
+        'events': dict(Counter(e['name'] for e in game.event_system.event_history)),
+    }
+
+def summarize(values):
+    """数值序列的分布摘要：均值、标准差、最值和分位数"""
+    values = np.asarray(values, dtype=np.float64)
+    summary = {
+        'mean': float(values.mean()),
+        'std': float(values.std()),
+        'min': float(values.min()),
+        'max': float(values.max()),
+    }
+    for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES).tolist()):
+        summary[f'p{q}'] = value
+    return summary
+
+def aggregate(results):
+    """汇总各局结果：总资产、收益率和最大回撤的分布，以及各事件的触发频率"""
+    runs = len(results)
+    totals = Counter()   # 各事件触发总次数
+    games = Counter()    # 各事件至少触发一次的局数
+    for result in results:
+        totals.update(result['events'])
+        games.update(result['events'].keys())
+    events = {
+        name: {'per_game': count / runs, 'game_fraction': games[name] / runs}
+        for name, count in totals.most_common()
+    }
+    return {
+        'runs': runs,
+        'final_assets': summarize([r['final_assets'] for r in results]),
+        'return': summarize([r['return'] for r in results]),
+        'max_drawdown': summarize([r['max_drawdown'] for r in results]),
+        'events': events,
+    }
+
+def run_monte_carlo(runs, days=365, strategy='buy_and_hold', seed=None, workers=None, fast=True,
+                    correlated=False, initial_money=100000, configure=None):
+    """并行运行 runs 局游戏，返回 (汇总, 各局结果)
+
+    strategy 为内置策略名或模块顶层定义的函数；configure 为可选的 configure(game)，
+    在开局后、模拟前调用，用于调整平衡性参数；workers 默认为 CPU 核数，为 1 时在当前进程中运行
+    """
+    if isinstance(strategy, str) and strategy not in STRATEGIES:
+        raise ValueError(f"未知策略: {strategy}，可选: {', '.join(STRATEGIES)}")
+    master = np.random.SeedSequence(seed).entropy
+    # 每局的种子为 [主种子, 序号]，经 SeedSequence 哈希后各局的随机数流互相独立
+    tasks = [{
+        'seed': [master, index],
+        'days': days,
+        'strategy': strategy,
+        'fast': fast,
+        'correlated': correlated,
+        'initial_money': initial_money,
+        'configure': configure,
+    } for index in range(runs)]
+
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    if workers == 1:
+        results = [run_game(task) for task in tasks]
+    else:
+        # 分块提交，减少进程间通信次数
+        chunksize = max(1, runs // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_game, tasks, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    summary = aggregate(results)
+    summary.update({
+        'seed': master,
+        'days': days,
+        'strategy': strategy if isinstance(strategy, str) else strategy.__name__,
+        'fast': fast,
+        'correlated': correlated,
+        'workers': workers,
+        'elapsed_seconds': elapsed,
+        'games_per_second': runs / elapsed if elapsed > 0 else None,
+    })
+    return summary, results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="蒙特卡洛批量模拟")
+    parser.add_argument('--runs', type=int, default=100, help="模拟的游戏局数")
+    parser.add_argument('--days', type=int, default=365, help="每局的游戏天数")
+    parser.add_argument('--strategy', default='buy_and_hold', choices=list(STRATEGIES), help="交易策略")
+    parser.add_argument('--seed', type=int, help="主随机种子（默认随机，摘要中会记录实际种子）")
+    parser.add_argument('--workers', type=int, help="进程数，默认为 CPU 核数")
+    parser.add_argument('--ticks', action='store_true', help="逐tick模拟（默认按日批量快进）")
+    parser.add_argument('--correlated', action='store_true', help="使用行业因子模型（同行业股票联动）")
+    parser.add_argument('--initial-money', type=float, default=100000, help="初始资金")
+    parser.add_argument('--out', help="汇总输出路径（JSON），默认打印到标准输出")
+    parser.add_argument('--games', help="各局结果输出路径（CSV）")
+    args = parser.parse_args(argv)
+
+    summary, results = run_monte_carlo(args.runs, days=args.days, strategy=args.strategy, seed=args.seed,
+                                       workers=args.workers, fast=not args.ticks,
+                                       correlated=args.correlated, initial_money=args.initial_money)
+
+    if args.games:
+        with open(args.games, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['index', 'final_assets', 'return', 'max_drawdown', 'events'])
+            for index, result in enumerate(results):
+                writer.writerow([index, f"{result['final_assets']:.2f}", f"{result['return']:.6f}",
+                                 f"{result['max_drawdown']:.6f}", sum(result['events'].values())])
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
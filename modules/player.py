@@ -2,7 +2,7 @@ from datetime import datetime, timedelta
 import math
 
 class Player:
-    def __init__(self, initial_money=10000):
+    def __init__(self, initial_money=10000, price_source=None):
         self.cash = float(initial_money)  # 现金
         self.stocks = {}                  # 持仓股票 {code: quantity}
         self.stock_holdings = {}          # 与 stocks 相同，为了兼容性
@@ -12,18 +12,72 @@ class Player:
         self.transaction_history = []      # 交易历史
         self.has_loan_default = False
         
+        # 行情来源：需提供 get_price(code)，未知代码返回 None；
+        # 可选提供 price_versions() 和 get_row(code)，用于跳过价格未变的持仓
+        self.price_source = price_source
+        self._portfolio_value = 0.0       # 持仓市值（增量维护）
+        self._valued_positions = {}       # 计入市值的持仓 {code: (row, price, quantity)}
+        self._seen_versions = None        # 上次估值时各行的价格版本号
+    
+    def bind_market(self, price_source):
+        """绑定实时行情来源"""
+        self.price_source = price_source
+        self._portfolio_value = 0.0
+        self._valued_positions = {}
+        self._seen_versions = None
+    
+    @property
+    def portfolio_value(self):
+        """持仓市值（只对价格或数量发生变化的持仓做增量更新）"""
+        source = self.price_source
+        if source is None:
+            return 0.0
+        
+        valued = self._valued_positions
+        if not self.stocks:
+            # 已全部清仓：直接归零，不留下增减累计的浮点残差
+            valued.clear()
+            self._portfolio_value = 0.0
+            return 0.0
+        
+        # 移除已清仓的股票
+        for code in [c for c in valued if c not in self.stocks]:
+            _, price, quantity = valued.pop(code)
+            self._portfolio_value -= price * quantity
+        
+        # 行情来源提供版本号时，只对价格版本变化的行重新取价
+        versions = source.price_versions() if hasattr(source, 'price_versions') else None
+        changed = None
+        if versions is not None and self._seen_versions is not None:
+            changed = (versions != self._seen_versions).tolist()
+        
+        # 更新价格或数量有变化的持仓
+        for code, quantity in self.stocks.items():
+            position = valued.get(code)
+            if position and changed is not None and not changed[position[0]] and position[2] == quantity:
+                continue
+            price = source.get_price(code)
+            if price is None:
+                continue
+            if position:
+                row = position[0]
+                self._portfolio_value -= position[1] * position[2]
+            else:
+                row = source.get_row(code) if versions is not None else None
+            self._portfolio_value += price * quantity
+            valued[code] = (row, price, quantity)
+        
+        if versions is not None:
+            self._seen_versions = versions.copy()
+        return self._portfolio_value
+    
     @property
     def total_assets(self):
         """计算总资产"""
         total = self.cash
         
         # 股票市值
-        from modules.stock_market import StockMarket
-        stock_market = StockMarket()
-        for code, quantity in self.stocks.items():
-            if code in stock_market.stocks:
-                stock = stock_market.stocks[code]
-                total += stock.price * quantity
+        total += self.portfolio_value
         
         # 存款及利息
         for deposit in self.deposits:
@@ -161,13 +215,11 @@ class Player:
             return True
             
         # 按市值从大到小排序持仓
-        from modules.stock_market import StockMarket
-        stock_market = StockMarket()
         holdings = []
         for code, quantity in self.stocks.items():
-            if code in stock_market.stocks:
-                stock = stock_market.stocks[code]
-                holdings.append((code, quantity, stock.price))
+            price = self.price_source.get_price(code) if self.price_source else None
+            if price is not None:
+                holdings.append((code, quantity, price))
         
         holdings.sort(key=lambda x: x[1] * x[2], reverse=True)
         
@@ -188,38 +240,37 @@ class Player:
 
     def try_sell_stocks_for_cash(self, needed_cash):
         """尝试卖出股票来获取现金"""
-        from modules.stock_market import StockMarket
-        stock_market = StockMarket()
-        
         # 计算所有持仓的市值
         holdings_value = []
-        for code, quantity in self.stocks.items():
-            if code in stock_market.stocks:
-                stock = stock_market.stocks[code]
-                value = stock.price * quantity
-                holdings_value.append((code, quantity, value))
+        for code, quantity in list(self.stocks.items()):
+            price = self.price_source.get_price(code) if self.price_source else None
+            if price is not None:
+                holdings_value.append((code, quantity, price))
         
         # 按市值从大到小排序
-        holdings_value.sort(key=lambda x: x[2], reverse=True)
+        holdings_value.sort(key=lambda x: x[1] * x[2], reverse=True)
         
         # 尝试卖出股票直到获得足够的现金
         cash_raised = 0
-        for code, quantity, value in holdings_value:
+        for code, quantity, price in holdings_value:
             if cash_raised >= needed_cash:
                 break
             
-            stock = stock_market.stocks[code]
             # 计算需要卖出的数量
             shares_to_sell = min(quantity, 
-                               math.ceil((needed_cash - cash_raised) / stock.price))
+                               math.ceil((needed_cash - cash_raised) / price))
             
-            if self.sell_stock(code, shares_to_sell, stock.price):
-                cash_raised += shares_to_sell * stock.price
+            success, _ = self.sell_stock(code, shares_to_sell, price)
+            if success:
+                cash_raised += shares_to_sell * price
         
         return cash_raised >= needed_cash
 
     def calculate_total_assets(self, stock_market):
         """计算总资产"""
+        if stock_market is self.price_source:
+            return self.total_assets
+        
         total = self.cash
         
         # 计算股票资产
@@ -0,0 +1,47 @@
+import random
+import numpy as np
+
+# 各子系统的随机数流，由同一个主种子经 SeedSequence 派生
+# 注意：派生结果与顺序有关，只能在末尾追加新名称，否则旧种子的回放会改变
+SUBSYSTEMS = ('stock_market', 'crypto_market', 'crypto_wallet', 'forex_market',
+              'event_system', 'lottery', 'player')
+
+def default_rng(rng=None):
+    """传入的 Generator 原样返回，未传入时新建一个不固定种子的 Generator"""
+    return rng if rng is not None else np.random.default_rng()
+
+def python_random(rng):
+    """由 numpy Generator 派生一个 random.Random
+
+    逐 tick 的标量抽样用 random.Random 比逐次调用 Generator 快得多
+    """
+    return random.Random(int(rng.integers(2 ** 63)))
+
+class RandomStreams:
+    """主种子及其派生出的各子系统随机数流"""
+
+    def __init__(self, seed=None):
+        sequence = np.random.SeedSequence(seed)
+        self.seed = sequence.entropy  # 未指定种子时为系统熵，存档后可据此回放
+        children = sequence.spawn(len(SUBSYSTEMS))
+        self.generators = {name: np.random.default_rng(child)
+                           for name, child in zip(SUBSYSTEMS, children)}
+
+    def generator(self, name):
+        """指定子系统的 numpy Generator"""
+        return self.generators[name]
+
+def get_state(owner):
+    """导出对象的随机数状态（owner.rng 与可选的 owner.random），可直接存为 JSON"""
+    state = {'numpy': owner.rng.bit_generator.state}
+    if hasattr(owner, 'random'):
+        version, internal, gauss = owner.random.getstate()
+        state['python'] = [version, list(internal), gauss]
+    return state
+
+def set_state(owner, state):
+    """恢复 get_state 导出的随机数状态"""
+    owner.rng.bit_generator.state = state['numpy']
+    if 'python' in state and hasattr(owner, 'random'):
+        version, internal, gauss = state['python']
+        owner.random.setstate((version, tuple(internal), gauss))
@@ -1,145 +1,519 @@
 import json
 import os
 from datetime import datetime
+import numpy as np
+from modules.history import HISTORY_TIERS, to_timestamp, from_timestamp
+from modules.rng import get_state, set_state
+
+SAVE_VERSION = 1                  # 二进制存档格式版本
+SAVE_EXT = ".sav"                 # 二进制存档扩展名（zip 容器，内部为压缩的 .npy 数组）
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+DATE_KEYS = ('date', 'start_date')  # JSON 存档中需要还原为 datetime 的记录字段
+MANIFEST_FILE = "manifest.json"      # 存档目录索引，列出存档时只需读取这一个小文件
+
+# 以列存方式保存的流水记录：(所属对象, 属性名)
+LEDGERS = [
+    ('player', 'transaction_history'),
+    ('player', 'loans'),
+    ('player', 'deposits'),
+    ('crypto_wallet', 'transaction_history'),
+    ('forex_wallet', 'transaction_history'),
+]
+
+# 只保存部分字段的K线周期：分时K线每根只有一个 tick，开高低与收盘相同
+BAR_SAVE_FIELDS = {'tick': ('close', 'volume')}
+
+# 需要保存价格历史的市场：(市场对象, 标的字典属性名)
+MARKETS = [
+    ('stock_market', 'stocks'),
+    ('crypto_market', 'cryptos'),
+]
+
+def _pack_histories(prefix, histories, arrays):
+    """把多条价格历史首尾相接打包成一个数组，用 offsets 划分"""
+    lengths = [len(history) for history in histories]
+    arrays[f"{prefix}.offsets"] = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    arrays[f"{prefix}.times"] = np.concatenate(
+        [history.timestamps() for history in histories] or [np.empty(0, dtype=np.int64)])
+    arrays[f"{prefix}.prices"] = np.concatenate(
+        [history.prices() for history in histories] or [np.empty(0, dtype=np.float64)])
+
+def _unpack_histories(prefix, data):
+    """按 offsets 拆分打包的价格历史，返回每条的 (时间戳, 价格)"""
+    offsets = data[f"{prefix}.offsets"].tolist()
+    times, prices = data[f"{prefix}.times"], data[f"{prefix}.prices"]
+    return [(times[start:end], prices[start:end]) for start, end in zip(offsets[:-1], offsets[1:])]
+
+def _column_kind(values):
+    """推断一列记录值的存储类型"""
+    if all(isinstance(v, datetime) for v in values):
+        return 'datetime'
+    if all(isinstance(v, bool) for v in values):
+        return 'bool'
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        return 'int'
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        return 'float'
+    if all(isinstance(v, str) for v in values):
+        return 'str'
+    return 'json'
+
+def _pack_records(name, records, arrays):
+    """把字典列表按字段拆成列数组写入 arrays，返回列描述"""
+    keys = []
+    for record in records:
+        for key in record:
+            if key not in keys:
+                keys.append(key)
+
+    columns = []
+    for key in keys:
+        present = np.array([key in record for record in records], dtype=bool)
+        values = [record[key] for record in records if key in record]
+        kind = _column_kind(values)
+        if kind == 'datetime':
+            column = np.array([to_timestamp(v) for v in values], dtype=np.int64)
+        elif kind == 'bool':
+            column = np.array(values, dtype=bool)
+        elif kind == 'int':
+            column = np.array(values, dtype=np.int64)
+        elif kind == 'float':
+            column = np.array(values, dtype=np.float64)
+        elif kind == 'str':
+            column = np.array(values, dtype=str)
+        else:
+            column = np.array([json.dumps(v, ensure_ascii=False) for v in values], dtype=str)
+
+        arrays[f"{name}.{key}"] = column
+        # 只有部分记录含有该字段时才额外保存掩码（例如只有卖出记录才有 profit）
+        has_mask = not present.all()
+        if has_mask:
+            arrays[f"{name}.{key}.mask"] = present
+        columns.append([key, kind, has_mask])
+
+    return {'count': len(records), 'columns': columns}
+
+def _unpack_records(name, schema, data):
+    """按列描述把列数组还原为字典列表"""
+    records = [{} for _ in range(schema['count'])]
+    for key, kind, has_mask in schema['columns']:
+        column = data[f"{name}.{key}"]
+        if kind == 'datetime':
+            values = [from_timestamp(ts) for ts in column.tolist()]
+        elif kind == 'json':
+            values = [json.loads(v) for v in column.tolist()]
+        else:
+            values = column.tolist()
+
+        if has_mask:
+            targets = (records[i] for i in np.flatnonzero(data[f"{name}.{key}.mask"]))
+        else:
+            targets = iter(records)
+        for record, value in zip(targets, values):
+            record[key] = value
+    return records
+
+def _encode_datetime(value):
+    """JSON 导出时把 datetime 转为字符串"""
+    if isinstance(value, datetime):
+        return value.strftime(DATE_FORMAT)
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+def _decode_dates(records):
+    """JSON 导入时把记录中的日期字符串还原为 datetime"""
+    for record in records:
+        for key in DATE_KEYS:
+            if isinstance(record.get(key), str):
+                record[key] = datetime.strptime(record[key], DATE_FORMAT)
+    return records
 
 class SaveSystem:
-    def __init__(self):
-        self.save_dir = "saves"
+    def __init__(self, save_dir="saves"):
+        self.save_dir = save_dir
         os.makedirs(self.save_dir, exist_ok=True)
-    
+
     def save_game(self, game, save_name):
-        """保存游戏状态"""
+        """保存游戏状态（二进制格式）"""
         try:
-            save_data = {
-                'date': game.game_date.strftime('%Y-%m-%d %H:%M:%S'),
-                'player': {
-                    'cash': game.player.cash,
-                    'stocks': game.player.stocks,
-                    'stock_costs': game.player.stock_costs,
-                    'loans': game.player.loans,
-                    'deposits': game.player.deposits,
-                    'transaction_history': game.player.transaction_history
-                },
-                'stock_market': {
-                    code: {
-                        'price': stock.price,
-                        'initial_price': stock.initial_price,
-                        'price_history': [(t.strftime('%Y-%m-%d %H:%M:%S'), p) 
-                                        for t, p in stock.price_history]
-                    } for code, stock in game.stock_market.stocks.items()
-                },
-                'crypto_market': {
-                    symbol: {
-                        'price': crypto.price,
-                        'initial_price': crypto.initial_price,
-                        'price_history': [(t.strftime('%Y-%m-%d %H:%M:%S'), p) 
-                                        for t, p in crypto.price_history]
-                    } for symbol, crypto in game.crypto_market.cryptos.items()
-                },
-                'crypto_wallet': {
-                    'holdings': game.crypto_wallet.holdings,
-                    'transaction_history': game.crypto_wallet.transaction_history
-                },
-                'forex_market': {
-                    'rates': game.forex_market.rates,
-                    'initial_rates': game.forex_market.initial_rates
-                },
-                'forex_wallet': {
-                    'balances': game.forex_wallet.balances,
-                    'transaction_history': game.forex_wallet.transaction_history
-                },
-                'game_speed': game.game_speed,
-                'is_paused': game.is_paused
-            }
-            
-            save_path = os.path.join(self.save_dir, f"{save_name}.json")
-            with open(save_path, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, ensure_ascii=False, indent=2)
-            
+            filename = f"{save_name}{SAVE_EXT}"
+            save_data = self._write_binary(game, os.path.join(self.save_dir, filename))
+
+            # 同步更新存档索引
+            manifest = self._load_manifest()
+            manifest[save_name] = self._manifest_entry(filename, save_data)
+            self._write_manifest(manifest)
             return True, "游戏已保存"
-            
+
         except Exception as e:
             return False, f"保存失败: {str(e)}"
-    
+
     def load_game(self, game, save_name):
-        """加载游戏存档"""
+        """加载游戏存档，兼容旧版 JSON 存档"""
         try:
-            save_path = os.path.join(self.save_dir, f"{save_name}.json")
-            with open(save_path, 'r', encoding='utf-8') as f:
-                save_data = json.load(f)
-            
-            # 恢复游戏日期
-            game.game_date = datetime.strptime(save_data['date'], '%Y-%m-%d %H:%M:%S')
-            
-            # 恢复玩家状态
-            player_data = save_data['player']
-            game.player.cash = player_data['cash']
-            game.player.stocks = player_data['stocks']
-            game.player.stock_costs = player_data['stock_costs']
-            game.player.loans = player_data['loans']
-            game.player.deposits = player_data['deposits']
-            game.player.transaction_history = player_data['transaction_history']
-            
-            # 恢复股票市场
-            for code, stock_data in save_data['stock_market'].items():
-                stock = game.stock_market.stocks[code]
-                stock.price = stock_data['price']
-                stock.initial_price = stock_data['initial_price']
-                stock.price_history = [
-                    (datetime.strptime(t, '%Y-%m-%d %H:%M:%S'), p)
-                    for t, p in stock_data['price_history']
-                ]
-            
-            # 恢复加密货币市场
-            for symbol, crypto_data in save_data['crypto_market'].items():
-                crypto = game.crypto_market.cryptos[symbol]
-                crypto.price = crypto_data['price']
-                crypto.initial_price = crypto_data['initial_price']
-                crypto.price_history = [
-                    (datetime.strptime(t, '%Y-%m-%d %H:%M:%S'), p)
-                    for t, p in crypto_data['price_history']
-                ]
-            
-            # 恢复加密货币钱包
-            crypto_wallet_data = save_data['crypto_wallet']
-            game.crypto_wallet.holdings = crypto_wallet_data['holdings']
-            game.crypto_wallet.transaction_history = crypto_wallet_data['transaction_history']
-            
-            # 恢复外汇市场
-            forex_data = save_data['forex_market']
-            game.forex_market.rates = forex_data['rates']
-            game.forex_market.initial_rates = forex_data['initial_rates']
-            
-            # 恢复外汇钱包
-            forex_wallet_data = save_data['forex_wallet']
-            game.forex_wallet.balances = forex_wallet_data['balances']
-            game.forex_wallet.transaction_history = forex_wallet_data['transaction_history']
-            
-            # 恢复游戏速度和暂停状态
-            game.game_speed = save_data['game_speed']
-            game.is_paused = save_data['is_paused']
-            game.update_interval = game.base_update_interval / game.game_speed
-            
+            save_path = os.path.join(self.save_dir, f"{save_name}{SAVE_EXT}")
+            if os.path.exists(save_path):
+                self._read_binary(game, save_path)
+            else:
+                self._read_json(game, os.path.join(self.save_dir, f"{save_name}.json"))
+
             return True, "游戏已加载"
-            
+
         except Exception as e:
             return False, f"加载失败: {str(e)}"
-    
+
+    def export_save(self, game, file_path):
+        """导出存档，扩展名为 .json 时导出为 JSON，否则为二进制格式"""
+        if file_path.lower().endswith(".json"):
+            self._write_json(game, file_path)
+        else:
+            self._write_binary(game, file_path)
+
+    def import_save(self, game, file_path):
+        """导入存档，自动识别二进制和 JSON 格式"""
+        with open(file_path, 'rb') as f:
+            is_binary = f.read(2) == b'PK'  # zip 容器文件头
+        if is_binary:
+            self._read_binary(game, file_path)
+        else:
+            self._read_json(game, file_path)
+
     def list_saves(self):
-        """列出所有存档"""
-        saves = []
+        """列出所有存档，按保存时间从早到晚排列"""
+        manifest = self._load_manifest()
+        saves = [dict(entry, name=name) for name, entry in manifest.items()]
+        saves.sort(key=lambda entry: entry["saved_at"])
+        return saves
+
+    def latest_save(self):
+        """最近保存的存档，没有存档时返回 None"""
+        saves = self.list_saves()
+        return saves[-1] if saves else None
+
+    def delete_save(self, save_name):
+        """删除指定存档"""
+        manifest = self._load_manifest()
+        entry = manifest.pop(save_name, None)
+        filenames = [entry["file"]] if entry else [f"{save_name}{SAVE_EXT}", f"{save_name}.json"]
+        for filename in filenames:
+            save_path = os.path.join(self.save_dir, filename)
+            if os.path.exists(save_path):
+                os.remove(save_path)
+        self._write_manifest(manifest)
+
+    def delete_all_saves(self):
+        """删除所有存档"""
         for filename in os.listdir(self.save_dir):
-            if filename.endswith(".json"):
-                save_path = os.path.join(self.save_dir, filename)
-                try:
+            if os.path.splitext(filename)[1] in (SAVE_EXT, ".json"):
+                os.remove(os.path.join(self.save_dir, filename))
+        self._write_manifest({})
+
+    # ---- 存档索引：{存档名: {file, date, game_date, cash, saved_at}} ----
+
+    def _manifest_entry(self, filename, save_data, saved_at=None):
+        if saved_at is None:
+            saved_at = datetime.now().isoformat(timespec='microseconds')
+        return {
+            "file": filename,
+            "date": save_data["date"],
+            "game_date": save_data["date"],
+            "cash": save_data["player"]["cash"],
+            "saved_at": saved_at
+        }
+
+    def _load_manifest(self):
+        """读取存档索引，并与目录中的文件名核对
+
+        只比较文件名列表，索引中缺失的存档（例如手动拷入或索引丢失）
+        才会打开文件读取元数据，已删除的存档则从索引中移除
+        """
+        manifest_path = os.path.join(self.save_dir, MANIFEST_FILE)
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)["saves"]
+        except Exception:
+            manifest = {}
+
+        files = {}
+        for filename in os.listdir(self.save_dir):
+            name, ext = os.path.splitext(filename)
+            # 同名存档优先使用二进制格式
+            if ext == SAVE_EXT or (ext == ".json" and filename != MANIFEST_FILE and name not in files):
+                files[name] = filename
+
+        changed = False
+        for name in [n for n, entry in manifest.items() if files.get(n) != entry.get("file")]:
+            del manifest[name]
+            changed = True
+
+        for name, filename in files.items():
+            if name in manifest:
+                continue
+            save_path = os.path.join(self.save_dir, filename)
+            try:
+                if filename.endswith(SAVE_EXT):
+                    save_data = self._read_meta(save_path)
+                else:
                     with open(save_path, "r", encoding="utf-8") as f:
                         save_data = json.load(f)
-                    saves.append({
-                        "name": filename[:-5],
-                        "date": save_data["date"],
-                        "game_date": save_data["date"],
-                        "cash": save_data["player"]["cash"]
-                    })
-                except:
-                    continue
-        return saves 
\ No newline at end of file
+                saved_at = datetime.fromtimestamp(os.path.getmtime(save_path)).isoformat(timespec='microseconds')
+                manifest[name] = self._manifest_entry(filename, save_data, saved_at)
+                changed = True
+            except:
+                continue
+
+        if changed:
+            self._write_manifest(manifest)
+        return manifest
+
+    def _write_manifest(self, manifest):
+        manifest_path = os.path.join(self.save_dir, MANIFEST_FILE)
+        temp_path = manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "saves": manifest}, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, manifest_path)
+
+    # ---- 公共状态（日期、现金、持仓、汇率等体积很小的部分） ----
+
+    def _collect_state(self, game):
+        """收集除价格历史和流水记录之外的游戏状态"""
+        stock_rows = game.stock_market.stock_rows
+        events = game.event_system.events
+        return {
+            'date': game.game_date.strftime(DATE_FORMAT),
+            'tick_count': game.tick_count,
+            'player': {
+                'cash': game.player.cash,
+                'stocks': game.player.stocks,
+                'stock_costs': game.player.stock_costs
+            },
+            'crypto_wallet': {
+                'holdings': game.crypto_wallet.holdings
+            },
+            # 行情的逐 tick 状态（价格历史另存在与市场同名的项中）
+            'market_state': {
+                'stock_market': {
+                    'market_sentiment': game.stock_market.market_sentiment,
+                    'turnover_rate': {stock.code: float(stock.turnover_rate) for stock in stock_rows},
+                    'market_cap': {stock.code: float(stock.market_cap) for stock in stock_rows}
+                },
+                'crypto_market': {
+                    'market_sentiment': game.crypto_market.market_sentiment,
+                    'momentum': {symbol: crypto.momentum for symbol, crypto in game.crypto_market.cryptos.items()}
+                }
+            },
+            'forex_market': {
+                'rates': game.forex_market.rates,
+                'initial_rates': game.forex_market.initial_rates,
+                'market_sentiment': game.forex_market.market_sentiment
+            },
+            'event_system': {
+                'schedule': game.event_system.export_schedule(),
+                'last_trigger': {event.name: event.last_trigger_date.strftime(DATE_FORMAT)
+                                 for event in events if event.last_trigger_date}
+            },
+            'forex_wallet': {
+                'balances': game.forex_wallet.balances
+            },
+            'game_speed': game.game_speed,
+            'is_paused': game.is_paused,
+            'rng': {
+                'seed': game.streams.seed,
+                'states': {name: get_state(owner) for name, owner in game.random_owners().items()}
+            }
+        }
+
+    def _apply_state(self, game, save_data):
+        """恢复除价格历史和流水记录之外的游戏状态"""
+        # 恢复游戏日期
+        game.game_date = datetime.strptime(save_data['date'], DATE_FORMAT)
+        game.tick_count = save_data.get('tick_count', 0)
+
+        # 恢复玩家状态
+        player_data = save_data['player']
+        game.player.cash = player_data['cash']
+        game.player.stocks = player_data['stocks']
+        game.player.stock_costs = player_data['stock_costs']
+
+        # 恢复加密货币钱包
+        game.crypto_wallet.holdings = save_data['crypto_wallet']['holdings']
+
+        # 恢复外汇市场
+        forex_data = save_data['forex_market']
+        game.forex_market.rates = forex_data['rates']
+        game.forex_market.initial_rates = forex_data['initial_rates']
+        game.forex_market.market_sentiment = forex_data.get('market_sentiment', 0)
+
+        # 恢复行情的逐 tick 状态（旧存档没有这些项，保持新开局的值）
+        market_state = save_data.get('market_state', {})
+        stock_data = market_state.get('stock_market')
+        if stock_data:
+            game.stock_market.market_sentiment = stock_data['market_sentiment']
+            for code, stock in game.stock_market.stocks.items():
+                if code in stock_data['turnover_rate']:
+                    stock.turnover_rate = stock_data['turnover_rate'][code]
+                    stock.market_cap = stock_data['market_cap'][code]
+        crypto_data = market_state.get('crypto_market')
+        if crypto_data:
+            game.crypto_market.market_sentiment = crypto_data['market_sentiment']
+            for symbol, crypto in game.crypto_market.cryptos.items():
+                crypto.momentum = crypto_data['momentum'].get(symbol, 0)
+
+        # 恢复事件的上次触发时间和触发调度，读档后按存档时的随机数序列继续
+        event_data = save_data.get('event_system')
+        if event_data:
+            last_trigger = event_data['last_trigger']
+            for event in game.event_system.events:
+                date = last_trigger.get(event.name)
+                event.last_trigger_date = datetime.strptime(date, DATE_FORMAT) if date else None
+            game.event_system.import_schedule(event_data['schedule'])
+
+        # 恢复外汇钱包
+        game.forex_wallet.balances = save_data['forex_wallet']['balances']
+
+        # 恢复游戏速度和暂停状态
+        game.game_speed = save_data['game_speed']
+        game.is_paused = save_data['is_paused']
+        game.update_interval = game.base_update_interval / game.game_speed
+
+        # 恢复各子系统的随机数状态（旧存档没有这一项，保持新开局的随机数流）；
+        # 主种子决定开局生成的股票基本面，这些并不随存档恢复，因此保留当前游戏的主种子
+        rng_data = save_data.get('rng')
+        if rng_data:
+            owners = game.random_owners()
+            for name, state in rng_data['states'].items():
+                if name in owners:
+                    set_state(owners[name], state)
+
+    # ---- 二进制格式：公共状态存为 JSON 元数据，价格历史和流水记录存为压缩列数组 ----
+
+    def _write_binary(self, game, save_path):
+        save_data = self._collect_state(game)
+        save_data['version'] = SAVE_VERSION
+        arrays = {}
+
+        # 价格历史：各标的首尾相接打包成一个数组，用 offsets 划分
+        for market_name, attr in MARKETS:
+            items = getattr(getattr(game, market_name), attr)
+            histories = [item.price_history for item in items.values()]
+            arrays[f"{market_name}.codes"] = np.array(list(items), dtype=str)
+            arrays[f"{market_name}.price"] = np.array([item.price for item in items.values()], dtype=np.float64)
+            arrays[f"{market_name}.initial_price"] = np.array([item.initial_price for item in items.values()],
+                                                              dtype=np.float64)
+            _pack_histories(market_name, histories, arrays)
+            # 各汇总层级同样打包保存
+            for tier in HISTORY_TIERS:
+                _pack_histories(f"{market_name}.tiers.{tier}", [history.tier(tier) for history in histories], arrays)
+
+        # K线按周期保存最近的窗口（行顺序与 stock_market.codes 一致）
+        for period, block in game.stock_market.bars.blocks.items():
+            window = block.window()
+            arrays[f"bars.{period}.times"] = block.times[window]
+            for field in BAR_SAVE_FIELDS.get(period, block.FIELDS):
+                arrays[f"bars.{period}.{field}"] = getattr(block, field)[:, window]
+
+        # 流水记录按列保存
+        save_data['ledgers'] = {}
+        for owner, attr in LEDGERS:
+            name = f"{owner}.{attr}"
+            records = getattr(getattr(game, owner), attr)
+            save_data['ledgers'][name] = _pack_records(name, records, arrays)
+
+        meta = json.dumps(save_data, ensure_ascii=False).encode('utf-8')
+        arrays['meta'] = np.frombuffer(meta, dtype=np.uint8)
+
+        # 先写临时文件再替换，避免写入中途失败损坏原存档
+        temp_path = save_path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(temp_path, save_path)
+        return save_data
+
+    def _read_meta(self, save_path):
+        """只读取二进制存档的元数据"""
+        with np.load(save_path) as data:
+            return json.loads(data['meta'].tobytes().decode('utf-8'))
+
+    def _read_binary(self, game, save_path):
+        with np.load(save_path) as data:
+            save_data = json.loads(data['meta'].tobytes().decode('utf-8'))
+            if save_data.get('version', 0) > SAVE_VERSION:
+                raise ValueError(f"存档版本 {save_data['version']} 高于当前支持的版本 {SAVE_VERSION}")
+
+            self._apply_state(game, save_data)
+
+            # 恢复价格历史
+            for market_name, attr in MARKETS:
+                items = getattr(getattr(game, market_name), attr)
+                codes = data[f"{market_name}.codes"].tolist()
+                prices = data[f"{market_name}.price"].tolist()
+                initial_prices = data[f"{market_name}.initial_price"].tolist()
+                histories = _unpack_histories(market_name, data)
+                tiers = {tier: _unpack_histories(f"{market_name}.tiers.{tier}", data)
+                         for tier in HISTORY_TIERS if f"{market_name}.tiers.{tier}.offsets" in data.files}
+                for i, code in enumerate(codes):
+                    item = items.get(code)
+                    if item is None:
+                        continue
+                    item.price = prices[i]
+                    item.initial_price = initial_prices[i]
+                    # 载入原始点时会重新汇总各层级，存档中有更早的汇总数据时再覆盖
+                    item.price_history.load_arrays(*histories[i])
+                    for tier, packed in tiers.items():
+                        item.price_history.tier(tier).load_arrays(*packed[i])
+
+            # 恢复K线（股票列表与存档一致时）
+            market = game.stock_market
+            if data["stock_market.codes"].tolist() == list(market.stocks):
+                for period, block in market.bars.blocks.items():
+                    if f"bars.{period}.times" in data.files:
+                        block.load(data[f"bars.{period}.times"],
+                                   {field: data[f"bars.{period}.{field}"] for field in block.FIELDS
+                                    if f"bars.{period}.{field}" in data.files})
+
+            # 恢复流水记录
+            for owner, attr in LEDGERS:
+                name = f"{owner}.{attr}"
+                schema = save_data['ledgers'].get(name)
+                records = _unpack_records(name, schema, data) if schema else []
+                setattr(getattr(game, owner), attr, records)
+
+    # ---- JSON 格式：与旧版存档结构相同，用于导出和兼容旧存档 ----
+
+    def _write_json(self, game, save_path):
+        save_data = self._collect_state(game)
+        for market_name, attr in MARKETS:
+            save_data[market_name] = {
+                code: {
+                    'price': item.price,
+                    'initial_price': item.initial_price,
+                    'price_history': [(t.strftime(DATE_FORMAT), p) for t, p in item.price_history]
+                } for code, item in getattr(getattr(game, market_name), attr).items()
+            }
+        for owner, attr in LEDGERS:
+            save_data[owner][attr] = getattr(getattr(game, owner), attr)
+
+        with open(save_path, 'w', encoding='utf-8') as f:
+            json.dump(save_data, f, ensure_ascii=False, indent=2, default=_encode_datetime)
+
+    def _read_json(self, game, save_path):
+        with open(save_path, 'r', encoding='utf-8') as f:
+            save_data = json.load(f)
+
+        self._apply_state(game, save_data)
+
+        # 恢复价格历史
+        for market_name, attr in MARKETS:
+            items = getattr(getattr(game, market_name), attr)
+            for code, item_data in save_data[market_name].items():
+                item = items[code]
+                item.price = item_data['price']
+                item.initial_price = item_data['initial_price']
+                item.price_history.load(
+                    (datetime.strptime(t, DATE_FORMAT), p)
+                    for t, p in item_data['price_history']
+                )
+
+        # 恢复流水记录
+        for owner, attr in LEDGERS:
+            records = save_data[owner].get(attr, [])
+            setattr(getattr(game, owner), attr, _decode_dates(records))
@@ -0,0 +1,60 @@
+import time
+
+class TickScheduler:
+    """游戏循环调度器：把模拟频率与界面刷新频率解耦
+
+    每次回调按游戏速度累计应执行的 tick 数，在时间预算内批量执行，
+    界面则按固定帧率上限刷新
+    """
+
+    def __init__(self, max_fps=30, frame_budget_ms=25):
+        self.max_fps = max_fps                  # 界面刷新帧率上限
+        self.frame_budget_ms = frame_budget_ms  # 每次回调用于模拟的时间预算（毫秒）
+        self.tick_cost_ms = 1.0                 # 单个 tick 的平均耗时（滑动平均）
+        self.tick_debt = 0.0                    # 尚未执行的 tick 数
+        self.last_time = None                   # 上次回调时间
+        self.last_render = None                 # 上次刷新界面时间
+
+    def reset(self):
+        """暂停或重置后清空积压，避免恢复时补跑大量 tick"""
+        self.tick_debt = 0.0
+        self.last_time = None
+
+    def ticks_due(self, tick_interval_ms):
+        """计算本次回调应执行的 tick 数"""
+        now = time.perf_counter()
+        if self.last_time is None:
+            self.last_time = now
+            return 1
+
+        elapsed_ms = (now - self.last_time) * 1000
+        self.last_time = now
+        self.tick_debt += elapsed_ms / max(tick_interval_ms, 1e-6)
+
+        # 按测得的单 tick 耗时限制本次执行量
+        budget_ticks = max(1, int(self.frame_budget_ms / self.tick_cost_ms))
+        ticks = min(int(self.tick_debt), budget_ticks)
+        self.tick_debt -= ticks
+
+        # 机器跟不上请求的速度时丢弃积压，防止越积越多卡死事件循环
+        if self.tick_debt > budget_ticks:
+            self.tick_debt = 0.0
+
+        return ticks
+
+    def record(self, ticks, elapsed_ms):
+        """记录本次批量模拟的耗时，更新单 tick 平均耗时"""
+        if ticks > 0:
+            self.tick_cost_ms = self.tick_cost_ms * 0.8 + (elapsed_ms / ticks) * 0.2
+
+    def should_render(self):
+        """是否到了刷新界面的时间"""
+        now = time.perf_counter()
+        if self.last_render is not None and now - self.last_render < 1 / self.max_fps:
+            return False
+        self.last_render = now
+        return True
+
+    def next_delay_ms(self, tick_interval_ms):
+        """下一次回调的延迟（毫秒），不超过一帧的时间"""
+        return max(1, int(min(tick_interval_ms, 1000 / self.max_fps)))
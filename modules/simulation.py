@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+import numpy as np
+from modules.history import to_timestamp, DAY_NS, TICKS_PER_DAY
+from modules.stock_market import StockMarket
+from modules.player import Player
+from modules.event_system import EventSystem
+from modules.lottery import Lottery
+from modules.crypto import CryptoMarket, CryptoWallet
+from modules.forex import ForexMarket, ForexWallet
+from modules.rng import RandomStreams, python_random
+
+class GameSimulation:
+    """游戏核心模拟，不依赖任何界面组件，可以无头运行"""
+
+    def __init__(self, initial_money=100000, vectorized=False, correlated=False, seed=None):
+        self.initial_money = initial_money  # 初始资金
+        self.vectorized = vectorized        # 是否启用向量化行情引擎
+        self.correlated = correlated        # 是否使用行业因子模型（同行业股票联动）
+        self.seed = seed                    # 主随机种子，None 表示每局随机
+
+        # 游戏速度控制
+        self.base_update_interval = 1000  # 基础更新间隔（毫秒）
+
+        self.reset_state()
+
+    def reset_state(self):
+        """重置游戏状态并重新初始化所有子系统"""
+        self.game_date = datetime(2023, 1, 1)  # 游戏起始日期
+        self.tick_count = 0  # 用于计数刷新次数
+        self.is_paused = False  # 游戏暂停状态
+        self.game_speed = 1.0  # 游戏速度倍率
+        self.update_interval = self.base_update_interval / self.game_speed
+
+        # 每个子系统使用由主种子派生的独立随机数流，同一种子可以完整回放
+        streams = self.streams = RandomStreams(self.seed)
+        self.rng = streams.generator('player')
+        self.random = python_random(self.rng)  # 玩家侧的随机操作（如彩票机选）
+
+        # 初始化各个子系统（价格历史使用游戏时间作为时间戳）
+        self.stock_market = StockMarket(vectorized=self.vectorized, clock=self.game_timestamp,
+                                        correlated=self.correlated,
+                                        rng=streams.generator('stock_market'))
+        self.player = Player(initial_money=self.initial_money, price_source=self.stock_market)
+        self.event_system = EventSystem(rng=streams.generator('event_system'))
+        self.lottery = Lottery(rng=streams.generator('lottery'))
+        self.crypto_market = CryptoMarket(clock=self.game_timestamp, rng=streams.generator('crypto_market'))
+        self.crypto_wallet = CryptoWallet(rng=streams.generator('crypto_wallet'))
+        self.forex_market = ForexMarket(rng=streams.generator('forex_market'))
+        self.forex_wallet = ForexWallet()
+
+    def random_owners(self):
+        """子系统名称 -> 持有该随机数流的对象，用于存档和读档时保存/恢复随机数状态"""
+        return {
+            'stock_market': self.stock_market,
+            'crypto_market': self.crypto_market,
+            'crypto_wallet': self.crypto_wallet,
+            'forex_market': self.forex_market,
+            'event_system': self.event_system,
+            'lottery': self.lottery,
+            'player': self,
+        }
+
+    def game_timestamp(self, ticks_per_day=TICKS_PER_DAY):
+        """当前游戏时间的 int64 纳秒时间戳，每个 tick 为 1/ticks_per_day 天"""
+        return to_timestamp(self.game_date) + self.tick_count * (DAY_NS // ticks_per_day)
+    
+    def simulate_tick(self):
+        """执行一个模拟tick，跨入新的一天时返回 True"""
+        self.tick_count += 1
+        new_day = False
+
+        if self.tick_count >= TICKS_PER_DAY:
+            self.game_date += timedelta(days=1)
+            self.tick_count = 0
+            new_day = True
+
+            # 检查事件
+            self.event_system.check_events(self.player, self.stock_market, self.game_date)
+
+            # 更新彩票
+            self.lottery.draw_lottery(self.game_date)
+            self.lottery.expire_prizes(self.game_date)
+
+        # 更新市场
+        self.stock_market.update_prices()
+
+        # 直接更新加密货币和外汇市场，它们的波动频率会随游戏速度变化
+        self.crypto_market.update_market()
+        self.forex_market.update_market()
+
+        # 更新玩家状态
+        self.player.update_loans_and_deposits(self.game_date)
+
+        return new_day
+
+    def simulate_days(self, days):
+        """连续模拟指定天数"""
+        for _ in range(days * TICKS_PER_DAY):
+            self.simulate_tick()
+    
+    def advance(self, days, ticks_per_day=TICKS_PER_DAY):
+        """批量快进指定天数
+        
+        行情按日界分段批量推进（股票需要向量化引擎，未启用时自动启用），
+        事件、彩票开奖兑奖以及贷款存款结算只在每个日界执行一次
+        """
+        tick_ns = DAY_NS // ticks_per_day
+        remaining = days * ticks_per_day
+        while remaining > 0:
+            if self.tick_count + 1 >= ticks_per_day:
+                # 跨入新的一天：先结算，再推进当天的 tick
+                self.game_date += timedelta(days=1)
+                self.tick_count = 0
+                self._settle_day()
+                first = 0
+            else:
+                first = self.tick_count + 1
+            count = min(remaining, ticks_per_day - first)
+            
+            timestamps = to_timestamp(self.game_date) + np.arange(first, first + count) * tick_ns
+            self.stock_market.advance(timestamps)
+            self.crypto_market.advance(timestamps)
+            self.forex_market.advance(count)
+            
+            self.tick_count = first + count - 1
+            remaining -= count
+    
+    def _settle_day(self):
+        """日界结算：事件、彩票开奖和过期奖项、贷款和存款"""
+        self.event_system.check_events(self.player, self.stock_market, self.game_date)
+        self.lottery.draw_lottery(self.game_date)
+        self.lottery.expire_prizes(self.game_date)
+        self.player.update_loans_and_deposits(self.game_date)
@@ -1,14 +1,57 @@
 import random
-from datetime import datetime
+import numpy as np
+from modules.rng import default_rng, python_random
+from modules.market_engine import MarketEngine, ENGINE_FIELDS, sentiment_path
+from modules.history import HistoryBlock, PriceHistory, TICKS_PER_DAY
+from modules.bars import BarAggregator
+
+# 行业标签：事件可以按标签批量影响多个细分行业，标签本身也匹配同名行业
+INDUSTRY_TAGS = {
+    "新能源": ["新能源车", "新能源材料", "光伏"],
+    "电池": ["新能源材料"],
+    "芯片": ["半导体", "半导体设备"],
+    "半导体": ["半导体设备"],
+    "券商": ["证券"],
+    "消费": ["白酒", "啤酒", "食品饮料", "食品", "家电"],
+    "医药股": ["医药", "中药"],
+    "基建": ["建筑", "建材"],
+    "周期": ["煤炭", "有色金属", "化工"],
+    "黄金": ["有色金属"],
+    "出口": ["家电"],
+    "制造业": ["机械", "汽车零部件"],
+    "农业": ["养殖", "饲料"],
+    "旅游": ["旅游地产"],
+    "军工": ["航天"],
+    "在线经济": ["互联网"],
+}
+
+class EngineField:
+    """绑定引擎的股票数值字段：直接读写引擎中的对应列"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, stock, owner=None):
+        if stock is None:
+            return self
+        return float(getattr(stock._engine, self.name)[stock._row])
+
+    def __set__(self, stock, value):
+        getattr(stock._engine, self.name)[stock._row] = value
 
 class Stock:
-    def __init__(self, code, name, industry, initial_price, params):
+    _engine = None  # 绑定的向量化引擎（未绑定时字段为普通实例属性）
+    _row = None     # 在引擎列中的行号
+
+    def __init__(self, code, name, industry, initial_price, params, history=None, random_source=None):
         self.code = code
         self.name = name
         self.industry = industry
         self.price = float(initial_price)
         self.initial_price = float(initial_price)
-        self.price_history = [(datetime.now(), self.price)]
+        self.price_history = history if history is not None else PriceHistory(100)
+        self.random = random_source if random_source is not None else random.Random()  # 由市场传入，保证可复现
+        self.record_price()
         
         # 从参数字典中获取基础波动参数
         self.volatility = params['volatility']  # 波动率
@@ -17,23 +60,53 @@ class Stock:
         self.resistance = params['resistance']   # 抗跌性
         
         # 新增市场因子
-        self.pe_ratio = params.get('pe_ratio', random.uniform(10, 50))  # 市盈率
-        self.pb_ratio = params.get('pb_ratio', random.uniform(1, 5))    # 市净率
-        self.market_cap = params.get('market_cap', initial_price * random.uniform(1e8, 1e10))  # 市值
+        self.pe_ratio = params.get('pe_ratio', self.random.uniform(10, 50))  # 市盈率
+        self.pb_ratio = params.get('pb_ratio', self.random.uniform(1, 5))    # 市净率
+        self.market_cap = params.get('market_cap', initial_price * self.random.uniform(1e8, 1e10))  # 市值
         self.float_shares = params.get('float_shares', self.market_cap / initial_price)  # 流通股本
-        self.dividend_yield = params.get('dividend_yield', random.uniform(0, 0.05))  # 股息率
-        self.turnover_rate = params.get('turnover_rate', random.uniform(0.5, 5))    # 换手率
+        self.dividend_yield = params.get('dividend_yield', self.random.uniform(0, 0.05))  # 股息率
+        self.turnover_rate = params.get('turnover_rate', self.random.uniform(0.5, 5))    # 换手率
         
         # 财务指标
-        self.revenue_growth = params.get('revenue_growth', random.uniform(-0.1, 0.3))  # 营收增长率
-        self.profit_margin = params.get('profit_margin', random.uniform(0.05, 0.3))    # 利润率
-        self.debt_ratio = params.get('debt_ratio', random.uniform(0.3, 0.7))          # 资产负债率
-        self.roe = params.get('roe', random.uniform(0.05, 0.25))                      # 净资产收益率
+        self.revenue_growth = params.get('revenue_growth', self.random.uniform(-0.1, 0.3))  # 营收增长率
+        self.profit_margin = params.get('profit_margin', self.random.uniform(0.05, 0.3))    # 利润率
+        self.debt_ratio = params.get('debt_ratio', self.random.uniform(0.3, 0.7))          # 资产负债率
+        self.roe = params.get('roe', self.random.uniform(0.05, 0.25))                      # 净资产收益率
+
+    def bind_engine(self, engine, row):
+        """绑定到向量化引擎的指定行（引擎已从实例属性复制各字段）
+
+        绑定后实例切换为 EngineStock，数值字段改由引擎列读写；
+        未绑定时仍是普通实例属性，逐只更新的路径没有额外开销
+        """
+        self._engine = engine
+        self._row = row
+        self.__class__ = EngineStock
+
+    def unbind_engine(self):
+        """解除与引擎的绑定，把引擎列中的当前值复制回实例属性"""
+        if self._engine is None:
+            return
+        values = {field: getattr(self, field) for field in ENGINE_FIELDS}
+        self.__class__ = Stock
+        self.__dict__.update(values)
+        del self._engine, self._row
+
+    def record_price(self, timestamp=None):
+        """把当前价格记入价格历史"""
+        self.price_history.append(self.price, timestamp)
         
     def update_price(self, market_sentiment=0):
         """更新股票价格"""
+        self.advance_price(market_sentiment, self.price_history.last_price())
+        
+        # 记录历史（环形缓冲区保留最近100个价格点）
+        self.record_price()
+    
+    def advance_price(self, market_sentiment, last_price):
+        """计算并设置新价格，不写入价格历史；last_price 为上一次记录的价格（用于限制涨跌幅）"""
         # 基础波动
-        change = random.normalvariate(self.trend, self.volatility)
+        change = self.random.normalvariate(self.trend, self.volatility)
         
         # 市场情绪影响
         market_impact = market_sentiment * self.beta
@@ -42,9 +115,9 @@ class Stock:
         
         # 考虑估值影响
         if self.pe_ratio > 30:  # 高估值股票更容易下跌
-            change -= random.uniform(0, 0.001)  # 减小影响幅度
+            change -= self.random.uniform(0, 0.001)  # 减小影响幅度
         elif self.pe_ratio < 15:  # 低估值股票有上涨动力
-            change += random.uniform(0, 0.0005)  # 减小影响幅度
+            change += self.random.uniform(0, 0.0005)  # 减小影响幅度
             
         # 考虑市值影响
         if self.market_cap > 1e10:  # 大市值股票波动较小
@@ -58,9 +131,9 @@ class Stock:
             
         # 考虑财务指标影响
         if self.revenue_growth > 0.2 and self.profit_margin > 0.15:  # 业绩优秀
-            change += random.uniform(0, 0.0005)  # 减小影响幅度
+            change += self.random.uniform(0, 0.0005)  # 减小影响幅度
         elif self.revenue_growth < 0 or self.profit_margin < 0.05:   # 业绩不佳
-            change -= random.uniform(0, 0.0005)  # 减小影响幅度
+            change -= self.random.uniform(0, 0.0005)  # 减小影响幅度
             
         # 价格回归机制
         price_diff_ratio = (self.price - self.initial_price) / self.initial_price
@@ -72,8 +145,7 @@ class Stock:
         self.price *= (1 + change + market_impact)
         
         # 限制单日波动幅度（±10%）
-        if self.price_history:
-            last_price = self.price_history[-1][1]
+        if last_price is not None:
             max_change = last_price * 0.1
             self.price = max(min(self.price, last_price + max_change), 
                             last_price - max_change)
@@ -84,19 +156,50 @@ class Stock:
         
         # 更新相关指标
         self.market_cap = self.price * self.float_shares
-        self.turnover_rate = random.uniform(0.5, 5)  # 随机更新换手率
-        
-        # 记录历史
-        self.price_history.append((datetime.now(), self.price))
-        if len(self.price_history) > 100:  # 保留最近100个价格点
-            self.price_history.pop(0)
+        self.turnover_rate = self.random.uniform(0.5, 5)  # 随机更新换手率
+
+class EngineStock(Stock):
+    """绑定了向量化引擎的股票：数值字段直接读写引擎中的对应列"""
+
+    # 数值字段（与 ENGINE_FIELDS 保持一致）
+    price = EngineField()
+    initial_price = EngineField()
+    volatility = EngineField()
+    trend = EngineField()
+    beta = EngineField()
+    resistance = EngineField()
+    pe_ratio = EngineField()
+    pb_ratio = EngineField()
+    market_cap = EngineField()
+    float_shares = EngineField()
+    dividend_yield = EngineField()
+    turnover_rate = EngineField()
+    revenue_growth = EngineField()
+    profit_margin = EngineField()
+    debt_ratio = EngineField()
+    roe = EngineField()
 
 class StockMarket:
-    def __init__(self):
-        """初始化股票市场"""
+    def __init__(self, vectorized=False, clock=None, correlated=False, rng=None):
+        """初始化股票市场
+
+        vectorized 为 True 时启用向量化引擎，按列批量更新全部股票价格；
+        clock 为返回当前时间戳的函数，用于给价格历史打时间戳（默认系统时间）；
+        correlated 为 True 时使用行业因子模型生成相关的波动（需要向量化引擎，会自动启用）；
+        rng 为本市场专用的 numpy Generator，传入同一种子派生的 Generator 即可复现行情
+        """
         self.stocks = {}  # 存储所有股票
         self.market_sentiment = 0  # 市场情绪
+        self.clock = clock
+        self.correlated = correlated
+        self.rng = default_rng(rng)
+        self.random = python_random(self.rng)  # 逐 tick 标量抽样用
+        self.history = None  # 所有股票共享的价格历史存储
+        self.bars = None     # 所有股票共享的 OHLCV K线
         self._initialize_stocks()  # 注意是下划线开头
+        self._build_industry_index()
+        self.engine = (MarketEngine(self.stocks.values(), rng=self.rng, correlated=correlated)
+                       if vectorized or correlated else None)
     
     def _initialize_stocks(self):  # 改为私有方法
         """初始化股票列表"""
@@ -950,11 +1053,39 @@ class StockMarket:
             })
         }
         
+        # 所有股票的价格历史共用一块环形缓冲区，每只股票占一行
+        self.history = HistoryBlock(len(self.stocks), capacity=100, clock=self.clock, versioned=True)
+        self.bars = BarAggregator(len(self.stocks))
+        
         # 初始化时统一处理股票代码格式
-        for code, (name, industry, price, params) in self.stocks.items():
+        for row, (code, (name, industry, price, params)) in enumerate(list(self.stocks.items())):
             # 确保code是6位字符串
             formatted_code = str(code).zfill(6)
-            self.stocks[formatted_code] = Stock(formatted_code, name, industry, price, params)
+            self.stocks[formatted_code] = Stock(formatted_code, name, industry, price, params,
+                                                history=self.history.row(row), random_source=self.random)
+    
+    def _build_industry_index(self):
+        """建立 行业 -> 行号 的索引，股票列表变化后需要重新调用"""
+        self.stock_rows = list(self.stocks.values())  # 按行号排列的股票，与价格历史和引擎的行一致
+        self.industry_index = {}
+        for row, stock in enumerate(self.stock_rows):
+            self.industry_index.setdefault(stock.industry, []).append(row)
+        self._tag_rows = {}  # 标签展开结果缓存
+        self.float_shares = np.array([stock.float_shares for stock in self.stock_rows])  # 流通股本不随行情变化，按行缓存
+    
+    def get_industry_rows(self, tag):
+        """行业或行业标签对应的股票行号数组"""
+        rows = self._tag_rows.get(tag)
+        if rows is None:
+            industries = [tag] + INDUSTRY_TAGS.get(tag, [])
+            matched = {row for industry in industries for row in self.industry_index.get(industry, [])}
+            rows = np.array(sorted(matched), dtype=np.int64)
+            self._tag_rows[tag] = rows
+        return rows
+    
+    def get_industry_stocks(self, tag):
+        """行业或行业标签对应的股票列表"""
+        return [self.stock_rows[row] for row in self.get_industry_rows(tag)]
     
     def get_stock(self, code):
         """获取指定股票"""
@@ -968,29 +1099,125 @@ class StockMarket:
             return self.stocks.get(str(code).zfill(6))
         return None
     
+    def get_price(self, code):
+        """获取指定股票的实时价格，不存在时返回 None"""
+        stock = self.get_stock(code)
+        return stock.price if stock else None
+    
+    def get_row(self, code):
+        """股票在价格历史中的行号，不存在时返回 None"""
+        stock = self.get_stock(code)
+        return stock.price_history.row if stock else None
+    
+    def price_versions(self):
+        """各行价格的版本号（每次写入价格历史时递增），版本号不变的行价格未变"""
+        return self.history.versions
+    
     def get_all_stocks(self):
         """获取所有股票"""
         return list(self.stocks.values())  # 返回列表而不是视图
     
+    def get_market_index(self):
+        """市场指数：所有股票相对初始价格的平均比值 x1000"""
+        if self.engine:
+            return float((self.engine.price / self.engine.initial_price).mean() * 1000)
+        ratios = [stock.price / stock.initial_price for stock in self.stocks.values()]
+        return sum(ratios) / len(ratios) * 1000
+    
     def update_prices(self):
         """更新所有股票价格"""
         self.update_market_sentiment()
-        for stock in self.stocks.values():
-            stock.update_price(self.market_sentiment)
+        if self.engine:
+            self.engine.step(self.market_sentiment)
+            self.history.append_rows(None, self.engine.price)
+        else:
+            # 逐只计算新价格，再把整列价格一次写入价格历史
+            sentiment = self.market_sentiment
+            for stock, last_price in zip(self.stock_rows, self.history.last_prices().tolist()):
+                stock.advance_price(sentiment, last_price)
+            self.history.append_rows(None, [stock.price for stock in self.stock_rows])
+        self._record_bars()
+    
+    def ensure_engine(self):
+        """确保已启用向量化引擎（批量快进需要），返回引擎"""
+        if self.engine is None:
+            self.engine = MarketEngine(self.stocks.values(), rng=self.rng, correlated=self.correlated)
+        return self.engine
+    
+    def advance(self, timestamps):
+        """批量推进多个 tick，timestamps 为每个 tick 的时间戳数组，返回价格路径"""
+        engine = self.ensure_engine()
+        ticks = len(timestamps)
+        
+        # 一次生成整段的情绪冲击（含1%概率的重大事件），再递推情绪序列
+        shocks = engine.rng.normal(0, 0.01, ticks)
+        shocks += np.where(engine.rng.random(ticks) < 0.01, engine.rng.uniform(-0.05, 0.05, ticks), 0)
+        sentiments = sentiment_path(self.market_sentiment, shocks)
+        self.market_sentiment = float(sentiments[-1])
+        
+        path, turnover = engine.advance(sentiments)
+        self.history.extend_rows(timestamps, path)
+        self.bars.extend(timestamps, path, self._tick_volume(turnover, engine.float_shares))
+        return path
+    
+    def _tick_volume(self, turnover_rate, float_shares):
+        """每个 tick 的成交量：日换手率（%）x 流通股本，平摊到一天的各个 tick"""
+        return turnover_rate / 100 * float_shares / TICKS_PER_DAY
+    
+    def _record_bars(self):
+        """把当前价格和成交量写入K线"""
+        if self.engine:
+            prices = self.engine.price
+            volumes = self._tick_volume(self.engine.turnover_rate, self.engine.float_shares)
+        else:
+            prices = self.history.last_prices()  # 本 tick 的价格列已由 update_prices 写入
+            volumes = self._tick_volume(np.array([stock.turnover_rate for stock in self.stock_rows]),
+                                        self.float_shares)
+        self.bars.update(self.history.now(), prices, volumes)
+    
+    def get_bars(self, code, period='day'):
+        """获取股票指定周期（tick/day/week）的K线：(起始时间, 开, 高, 低, 收, 量)"""
+        stock = self.get_stock(code)
+        if stock is None:
+            return None
+        return self.bars.series(stock.price_history.row, period)
     
     def update_market_sentiment(self):
         """更新市场情绪"""
         # 市场情绪具有延续性，但会逐渐回归
-        self.market_sentiment = self.market_sentiment * 0.95 + random.normalvariate(0, 0.01)
+        self.market_sentiment = self.market_sentiment * 0.95 + self.random.normalvariate(0, 0.01)
         
         # 随机重大事件
-        if random.random() < 0.01:  # 1%概率发生重大事件
-            self.market_sentiment += random.uniform(-0.05, 0.05) 
+        if self.random.random() < 0.01:  # 1%概率发生重大事件
+            self.market_sentiment += self.random.uniform(-0.05, 0.05) 
     
     def apply_global_change(self, change_percent):
         """应用全局价格变化"""
-        for stock in self.stocks.values():
+        if self.engine:
+            self.engine.price *= (1 + change_percent)
+            self.history.append_rows(None, self.engine.price)
+            return
+        for stock in self.stock_rows:
             stock.price *= (1 + change_percent)
-            stock.price_history.append((datetime.now(), stock.price))
-            if len(stock.price_history) > 100:
-                stock.price_history.pop(0)
\ No newline at end of file
+        self.history.append_rows(None, [stock.price for stock in self.stock_rows])
+    
+    def apply_industry_change(self, tag, change_percent):
+        """对某个行业（或行业标签）的股票应用价格变化，只处理索引中匹配的行"""
+        rows = self.get_industry_rows(tag)
+        if self.engine:
+            self.engine.price[rows] *= (1 + change_percent)
+            self.history.append_rows(rows, self.engine.price[rows])
+            return
+        for row in rows.tolist():
+            self.stock_rows[row].price *= (1 + change_percent)
+        self.history.append_rows(rows, [self.stock_rows[row].price for row in rows.tolist()])
+    
+    def apply_price_factors(self, rows, factors):
+        """按行号批量乘以价格乘数（事件效果编译后的批量调整）"""
+        if self.engine:
+            self.engine.price[rows] *= factors
+            self.history.append_rows(rows, self.engine.price[rows])
+            return
+        for row, factor in zip(rows.tolist(), np.asarray(factors).tolist()):
+            self.stock_rows[row].price *= factor
+        self.history.append_rows(rows, [self.stock_rows[row].price for row in rows.tolist()])
\ No newline at end of file